@@ -0,0 +1,176 @@
+"""
+Run a JSONL file of queries through the agent with bounded concurrency.
+
+Each input line is a JSON object with a query (and optionally an id). Results are
+appended to the output JSONL as soon as each query finishes, one row per query with
+its answer, latency, token usage and stage timings. The output file doubles as the checkpoint:
+rerunning the same command skips ids that already have a successful row, so a
+crashed or interrupted run resumes where it stopped. Rows that failed are retried.
+
+    uv run batch.py queries.jsonl results.jsonl --concurrency 20
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, Iterator, Set, TextIO, Tuple
+from main import AsyncAgent
+from src.plan_cache import PlanCache
+from src.rate_limit import RateLimiter
+from src.usage import track_usage
+from src.metrics import trace
+from src.tool_catalog import load_catalog
+
+logger = logging.getLogger(__name__)
+
+PLAN_ERROR_PREFIX = "Error executing plan"
+
+
+def read_queries(path: str, query_field: str, id_field: str) -> Iterator[Tuple[str, str]]:
+    """Lazily yield (id, query) pairs; rows without an id are keyed by their line number."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed input line {line_number}")
+                continue
+            query = row.get(query_field) if isinstance(row, dict) else None
+            if not isinstance(query, str):
+                logger.warning(f"Skipping input line {line_number} without a '{query_field}' string")
+                continue
+            yield str(row.get(id_field, line_number)), query
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids with a successful row in an existing output file. A torn last line is ignored."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("error"):
+                done.discard(row["id"])
+            else:
+                done.add(row["id"])
+    return done
+
+
+def open_output(path: str) -> TextIO:
+    """Open the output for appending, terminating a line torn by a previous crash."""
+    torn = False
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    out = open(path, "a", encoding="utf-8")
+    if torn:
+        out.write("\n")
+    return out
+
+
+def build_agent(args: argparse.Namespace) -> AsyncAgent:
+    agent = AsyncAgent(
+        max_workers=args.tool_workers,
+        render_mode=args.render_mode,
+        plan_cache=PlanCache.from_env(),
+        speculative=args.speculative,
+        rate_limiter=RateLimiter.from_env()
+    )
+    for tool in load_catalog(asynchronous=True):
+        agent.add_tool(tool)
+    return agent
+
+
+async def run_query(agent: AsyncAgent, query_id: str, query: str) -> Dict[str, Any]:
+    """Answer one query and describe it as an output row."""
+    start = time.perf_counter()
+    with track_usage() as usage, trace() as spans:
+        output = await agent.execute_plan(query)
+    return {
+        "id": query_id,
+        "query": query,
+        "output": output,
+        "error": output.startswith(PLAN_ERROR_PREFIX),
+        "latency_s": round(time.perf_counter() - start, 4),
+        "usage": usage.as_dict(),
+        "spans": spans,
+    }
+
+
+async def run_batch(args: argparse.Namespace) -> Dict[str, int]:
+    """Stream queries through a fixed pool of workers, appending rows as they finish."""
+    agent = build_agent(args)
+    done = completed_ids(args.output)
+    if done:
+        logger.info(f"Resuming: {len(done)} queries already completed in {args.output}")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    stats = {"completed": 0, "failed": 0, "skipped": 0}
+
+    with open_output(args.output) as out:
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                row = await run_query(agent, *item)
+                # Rows are written from the event loop thread, so lines never interleave
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["failed" if row["error"] else "completed"] += 1
+                total = stats["completed"] + stats["failed"]
+                if total % args.log_every == 0:
+                    logger.info(f"Processed {total} queries ({stats['failed']} failed)")
+
+        workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+        for query_id, query in read_queries(args.input, args.query_field, args.id_field):
+            if query_id in done:
+                stats["skipped"] += 1
+                continue
+            # Blocks while the queue is full, so the input is never read far ahead
+            await queue.put((query_id, query))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    return stats
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through the agent.")
+    parser.add_argument("input", help="Input JSONL, one object per line with a query field")
+    parser.add_argument("output", help="Output JSONL, appended to and used as the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="Queries in flight at once")
+    parser.add_argument("--tool-workers", type=int, default=4, help="Concurrent tool calls per query")
+    parser.add_argument("--query-field", default="query", help="Input field holding the query text")
+    parser.add_argument("--id-field", default="id", help="Input field holding a unique row id")
+    parser.add_argument("--render-mode", default="llm", choices=["auto", "llm", "template"])
+    parser.add_argument("--speculative", action="store_true", help="Dispatch tools while the plan streams")
+    parser.add_argument("--log-every", type=int, default=100, help="Progress log interval, in queries")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    stats = asyncio.run(run_batch(args))
+    elapsed = time.perf_counter() - start
+    processed = stats["completed"] + stats["failed"]
+    logger.info(
+        f"Done in {elapsed:.1f}s: {stats['completed']} completed, {stats['failed']} failed, "
+        f"{stats['skipped']} skipped ({processed / elapsed if elapsed else 0:.1f} queries/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class LatencyModel:
+    """
+    Log-normal latency with the given median and 99th percentile, in seconds.
+
+    Real upstreams have a long right tail; a log-normal fitted on two quantiles
+    reproduces it well enough for regression tracking.
+    """
+    median: float = 0.05
+    p99: float = 0.2
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99, self.median) / self.median) / 2.326
+        return rng.lognormvariate(math.log(self.median), sigma)
+
+
+PlanBuilder = Callable[[re.Match], Dict[str, Any]]
+
+
+def _currency_plan(match: re.Match) -> Dict[str, Any]:
+    amount, source, target = match.group(1), match.group(2).upper(), match.group(3).upper()
+    return {
+        "thought": f"The user wants to convert {source} to {target}",
+        "plan": ["Convert the amount with convert_currency"],
+        "requires_tools": True,
+        "tool_calls": [{"tool": "convert_currency",
+                        "args": {"amount": float(amount), "from_currency": source, "to_currency": target}}],
+    }
+
+
+def _weather_plan(match: re.Match) -> Dict[str, Any]:
+    return {
+        "thought": "The user asks for the current weather",
+        "plan": ["Look up the weather with get_weather"],
+        "requires_tools": True,
+        "tool_calls": [{"tool": "get_weather", "args": {"city": match.group(1).strip()}}],
+    }
+
+
+def _search_plan(match: re.Match) -> Dict[str, Any]:
+    return {
+        "thought": "The user asks for information from the web",
+        "plan": ["Search with tavily_search"],
+        "requires_tools": True,
+        "tool_calls": [{"tool": "tavily_search", "args": {"query": match.group(1).strip(), "max_results": 3}}],
+    }
+
+
+# Canned plans, chosen by the first pattern matching the user query
+DEFAULT_ROUTES: List[Tuple[re.Pattern, PlanBuilder]] = [
+    (re.compile(r"convert ([\d.]+) (\w{3}) to (\w{3})", re.IGNORECASE), _currency_plan),
+    (re.compile(r"weather in (.+)", re.IGNORECASE), _weather_plan),
+    (re.compile(r"search (?:article about )?(.+)", re.IGNORECASE), _search_plan),
+]
+
+
+class _Server(ThreadingHTTPServer):
+    # Bursts of concurrent connections must not overflow the default backlog of 5
+    request_queue_size = 256
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients hang up on purpose, e.g. when a hedged stream loses the race
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _start(handler: type) -> Tuple[ThreadingHTTPServer, str]:
+    server = _Server(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeGroqServer:
+    """
+    Local stand-in for the OpenAI-compatible Groq chat completions endpoint.
+
+    Planning requests get a canned plan routed from the user query; summary requests
+    echo the tool results. Both streaming (SSE) and plain responses are supported and
+    report usage, so the agent's token accounting works unchanged. Point the client at
+    it with ``GROQ_BASE_URL``.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyModel = LatencyModel(0.3, 1.0),
+        routes: Optional[List[Tuple[re.Pattern, PlanBuilder]]] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.routes = routes if routes is not None else DEFAULT_ROUTES
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.url = ""
+
+    def plan_for(self, query: str) -> Dict[str, Any]:
+        for pattern, build in self.routes:
+            match = pattern.search(query)
+            if match:
+                return build(match)
+        return {
+            "thought": "No tool is needed",
+            "plan": ["Answer directly"],
+            "requires_tools": False,
+            "direct_response": f"Direct answer to: {query}",
+        }
+
+    def completion_text(self, messages: List[Dict[str, str]]) -> str:
+        user = messages[-1]["content"] if messages else ""
+        if "Results:" in user:
+            return "Here is what I found for your trip: " + user.split("Results:", 1)[1].strip()
+        return json.dumps(self.plan_for(user))
+
+    def start(self) -> str:
+        fake = self
+
+        class Handler(_JsonHandler):
+            def do_POST(self) -> None:
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json({"error": {"message": "not found"}}, status=404)
+                    return
+                fake.requests += 1
+                request = self._read_json()
+                text = fake.completion_text(request.get("messages", []))
+                delay = fake.latency.sample(fake.rng)
+                prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+                usage = {
+                    "prompt_tokens": prompt_chars // 4,
+                    "completion_tokens": len(text) // 4,
+                    "total_tokens": prompt_chars // 4 + len(text) // 4,
+                }
+                if request.get("stream"):
+                    self._stream(request.get("model", ""), text, usage, delay)
+                else:
+                    time.sleep(delay)
+                    self._send_json(_completion(request.get("model", ""), text, usage))
+
+            def _stream(self, model: str, text: str, usage: Dict[str, int], delay: float) -> None:
+                pieces = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+                # A third of the latency before the first token, the rest spread over the chunks
+                time.sleep(delay / 3)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                for index, piece in enumerate(pieces):
+                    last = index == len(pieces) - 1
+                    chunk = _chunk(completion_id, model, piece, usage if last else None)
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                    time.sleep(delay * 2 / 3 / len(pieces))
+                self._write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, data: str) -> None:
+                body = data.encode("utf-8")
+                self.wfile.write(f"{len(body):x}\r\n".encode("ascii") + body + b"\r\n")
+                self.wfile.flush()
+
+        self.server, self.url = _start(Handler)
+        return self.url
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def _completion(model: str, text: str, usage: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+def _chunk(completion_id: str, model: str, text: str, usage: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": "stop" if usage else None}],
+    }
+    if usage is not None:
+        chunk["x_groq"] = {"id": completion_id, "usage": usage}
+    return chunk
+
+
+class FakeToolServer:
+    """
+    Local stand-in for the exchange-rate, weatherstack and Tavily APIs.
+
+    Routes: ``GET /v6/latest/<base>``, ``GET /current?query=<city>`` and ``POST /search``,
+    each answering in the upstream's response shape after a sampled delay.
+    """
+
+    RATES = {"USD": 1.0, "EUR": 0.92, "JPY": 151.3, "IDR": 16250.0, "GBP": 0.79, "RSD": 108.1}
+
+    def __init__(self, latency: LatencyModel = LatencyModel(0.05, 0.3), seed: Optional[int] = None):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = {"rates": 0, "weather": 0, "search": 0}
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.url = ""
+
+    def start(self) -> str:
+        fake = self
+
+        class Handler(_JsonHandler):
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                time.sleep(fake.latency.sample(fake.rng))
+                if url.path.startswith("/v6/latest/"):
+                    fake.requests["rates"] += 1
+                    base = url.path.rsplit("/", 1)[-1].upper()
+                    base_rate = fake.RATES.get(base, 1.0)
+                    self._send_json({
+                        "result": "success",
+                        "base_code": base,
+                        "rates": {code: rate / base_rate for code, rate in fake.RATES.items()},
+                    })
+                elif url.path == "/current":
+                    fake.requests["weather"] += 1
+                    city = parse_qs(url.query).get("query", ["Unknown"])[0]
+                    self._send_json({
+                        "location": {"name": city, "country": "Benchland"},
+                        "current": {
+                            "temperature": 21, "feelslike": 22, "humidity": 60, "wind_speed": 8, "uv_index": 4,
+                            "weather_descriptions": ["Partly cloudy"],
+                            "astro": {"sunrise": "05:30 AM", "sunset": "06:45 PM"},
+                        },
+                    })
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self) -> None:
+                time.sleep(fake.latency.sample(fake.rng))
+                if urlparse(self.path).path != "/search":
+                    self._send_json({"error": "not found"}, status=404)
+                    return
+                fake.requests["search"] += 1
+                query = self._read_json().get("query", "")
+                self._send_json({"results": [
+                    {
+                        "title": f"{query} guide {i}",
+                        "url": f"https://example.com/{i}/{uuid.uuid4().hex[:8]}",
+                        "content": f"Summary {i} about {query}.",
+                        "raw_content": f"Full article {i} about {query}. " * 40,
+                    }
+                    for i in range(3)
+                ]})
+
+        self.server, self.url = _start(Handler)
+        return self.url
+
+    def env(self) -> Dict[str, str]:
+        """Environment overrides pointing the tools at this server."""
+        return {
+            "EXCHANGE_RATE_URL": f"{self.url}/v6/latest",
+            "WEATHER_URL": f"{self.url}/current",
+            "TAVILY_SEARCH_URL": f"{self.url}/search",
+        }
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,112 @@
+"""
+Microbenchmark of search-result formatting over large synthetic result sets.
+
+Compares the previous ``formatted_text += ...`` implementation with
+``deduplicate_and_format_sources`` (joined once) and with streaming the chunks of
+``iter_formatted_sources`` into a sink without building the string:
+
+    cd agent_tools
+    python -m benchmarks.format_sources --responses 10 --results 50 --raw-chars 16000
+"""
+import json
+import random
+import argparse
+import statistics
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+from src.tools import deduplicate_and_format_sources, iter_formatted_sources
+
+TRACKING = ["", "?utm_source=newsletter", "?utm_medium=social&utm_campaign=spring", "?gclid=abc123", "#comments"]
+
+
+def make_responses(responses: int, results: int, raw_chars: int, duplicates: float, seed: int) -> List[Dict[str, Any]]:
+    """Tavily-shaped responses where a share of results repeat an earlier URL, decorated differently."""
+    rng = random.Random(seed)
+    words = "japan kyoto temple travel rail ramen autumn festival museum garden".split()
+    seen: List[str] = []
+    output = []
+    for r in range(responses):
+        items = []
+        for i in range(results):
+            if seen and rng.random() < duplicates:
+                url = rng.choice(seen).replace("https://", rng.choice(["http://", "https://www."]))
+                url += rng.choice(TRACKING)
+            else:
+                url = f"https://example{r}.com/articles/{i}"
+                seen.append(url)
+            text = " ".join(rng.choice(words) for _ in range(raw_chars // 6))
+            items.append({"title": f"Article {r}-{i}", "url": url, "content": text[:300], "raw_content": text})
+        output.append({"results": items})
+    return output
+
+
+def legacy_format(search_response: List[Dict[str, Any]], max_tokens_per_source: int, fetch_full_page: bool) -> str:
+    """The previous implementation: exact-URL dedupe and repeated string concatenation."""
+    sources_list = []
+    for response in search_response:
+        sources_list.extend(response['results'])
+    unique_sources = {}
+    for source in sources_list:
+        if source['url'] not in unique_sources:
+            unique_sources[source['url']] = source
+    formatted_text = "Sources:\n\n"
+    for source in unique_sources.values():
+        formatted_text += f"Source: {source['title']}\n===\n"
+        formatted_text += f"URL: {source['url']}\n===\n"
+        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+        if fetch_full_page:
+            char_limit = max_tokens_per_source * 4
+            raw_content = source.get('raw_content') or ''
+            if len(raw_content) > char_limit:
+                raw_content = raw_content[:char_limit] + "... [truncated]"
+            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
+    return formatted_text.strip()
+
+
+def stream_to_sink(search_response: List[Dict[str, Any]], max_tokens_per_source: int, fetch_full_page: bool) -> int:
+    """Consume the chunks as a prompt writer would, without joining them."""
+    written = 0
+    for chunk in iter_formatted_sources(search_response, max_tokens_per_source, fetch_full_page):
+        written += len(chunk)
+    return written
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = timeit.repeat(func, number=1, repeat=repeat)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "min_ms": round(min(times) * 1000, 2),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search-result formatting.")
+    parser.add_argument("--responses", type=int, default=10, help="Search responses merged into one input")
+    parser.add_argument("--results", type=int, default=50, help="Results per response")
+    parser.add_argument("--raw-chars", type=int, default=16000, help="Characters of raw_content per result")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Share of results repeating an earlier URL")
+    parser.add_argument("--max-tokens", type=int, default=4096, help="max_tokens_per_source")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per variant")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = make_responses(args.responses, args.results, args.raw_chars, args.duplicates, args.seed)
+    variants = {
+        "legacy_concat": lambda: legacy_format(data, args.max_tokens, True),
+        "joined": lambda: deduplicate_and_format_sources(data, args.max_tokens, True),
+        "streamed": lambda: stream_to_sink(data, args.max_tokens, True),
+    }
+    report = {name: measure(func, args.repeat) for name, func in variants.items()}
+    report["legacy_concat"]["sources"] = variants["legacy_concat"]().count("\nURL: ")
+    report["joined"]["sources"] = variants["joined"]().count("\nURL: ")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Import-time (cold start) profile of the agent.
+
+Each scenario runs in a fresh interpreter with ``python -X importtime`` and reports
+the wall time plus the modules with the largest cumulative import cost:
+
+    cd agent_tools
+    python -m benchmarks.import_profile --top 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Any, Dict, List, Tuple
+
+SCENARIOS = {
+    # What a worker pays before serving its first request
+    "agent_ready": (
+        "from main import Agent\n"
+        "from src.tool_catalog import load_catalog\n"
+        "agent = Agent()\n"
+        "for tool in load_catalog():\n"
+        "    agent.add_tool(tool)\n"
+        "agent.create_system_prompt()\n"
+    ),
+    # Cost deferred to the first tool call and the first LLM call
+    "tools_loaded": "import src.tools\n",
+    "llm_client": "import groq\n",
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        # One space follows the separator; nested imports are indented two more per level
+        rows.append((module.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(code: str, top: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "profile")},
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.splitlines()[-1] if result.stderr else "profiling failed")
+
+    rows = parse_importtime(result.stderr)
+    # Top-level imports (no indentation) add up to the total import time
+    total_us = sum(cumulative for module, _, cumulative in rows if not module.startswith(" "))
+    heaviest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    return {
+        "wall_s": round(wall, 3),
+        "imports_s": round(total_us / 1e6, 3),
+        "modules": len(rows),
+        "heaviest": [{"module": module.strip(), "cumulative_ms": round(cumulative / 1000, 1)}
+                     for module, _, cumulative in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile agent import time in fresh interpreters.")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest modules to list per scenario")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = {name: profile(code, args.top) for name, code in SCENARIOS.items()}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, result in report.items():
+        print(f"\n{name}: {result['imports_s'] * 1000:.0f} ms importing {result['modules']} modules "
+              f"({result['wall_s'] * 1000:.0f} ms wall)")
+        for row in result["heaviest"]:
+            print(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+
+
+if __name__ == "__main__":
+    main()
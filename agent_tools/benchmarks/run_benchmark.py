@@ -0,0 +1,188 @@
+"""
+Offline throughput/latency benchmark for Agent.execute_plan.
+
+Starts a fake Groq endpoint and fake tool upstreams on localhost, points the agent at
+them through environment variables and drives a mix of queries at a fixed concurrency.
+No network access or API keys are needed, so it can run in CI:
+
+    cd agent_tools
+    python -m benchmarks.run_benchmark --requests 500 --concurrency 32 --max-p95 2.0
+"""
+import os
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from benchmarks.fake_servers import FakeGroqServer, FakeToolServer, LatencyModel
+
+CITIES = ["Tokyo", "Osaka", "Kyoto", "Paris", "Jakarta", "Belgrade", "Lisbon", "Seoul", "Bangkok", "Oslo"]
+CURRENCIES = ["USD", "EUR", "JPY", "IDR", "GBP", "RSD"]
+TOPICS = ["traveling to Japan", "street food in Bangkok", "hiking in Norway", "museums in Paris"]
+
+
+def make_queries(count: int, seed: int) -> List[str]:
+    """A reproducible mix of currency, weather, search and direct-answer queries."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.35:
+            source, target = rng.sample(CURRENCIES, 2)
+            queries.append(f"Convert {rng.randint(1, 100000)} {source} to {target}")
+        elif kind < 0.7:
+            queries.append(f"What is the weather in {rng.choice(CITIES)}")
+        elif kind < 0.9:
+            queries.append(f"Search article about {rng.choice(TOPICS)}")
+        else:
+            queries.append("What is a good time of year to travel?")
+    return queries
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(p * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_s": round(percentile(ordered, 0.50), 4),
+        "p95_s": round(percentile(ordered, 0.95), 4),
+        "p99_s": round(percentile(ordered, 0.99), 4),
+        "max_s": round(ordered[-1], 4) if ordered else 0.0,
+    }
+
+
+def build_agent(args: argparse.Namespace):
+    from main import Agent, AsyncAgent
+    from src.metrics import Metrics
+    from src.tool_catalog import load_catalog
+
+    agent_class = AsyncAgent if args.mode == "async" else Agent
+    agent = agent_class(max_workers=args.tool_workers, render_mode=args.render_mode,
+                        speculative=args.speculative, metrics=Metrics())
+    # Tool modules read their upstream URLs from the environment when first used
+    for tool in load_catalog(asynchronous=args.mode == "async"):
+        agent.add_tool(tool)
+    return agent
+
+
+def run_sync(agent, queries: List[str], concurrency: int) -> List[tuple]:
+    def timed(query: str) -> tuple:
+        start = time.perf_counter()
+        output = agent.execute_plan(query)
+        return time.perf_counter() - start, output.startswith("Error executing plan")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, queries))
+
+
+async def run_async(agent, queries: List[str], concurrency: int) -> List[tuple]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(query: str) -> tuple:
+        async with semaphore:
+            start = time.perf_counter()
+            output = await agent.execute_plan(query)
+            return time.perf_counter() - start, output.startswith("Error executing plan")
+
+    return await asyncio.gather(*(timed(query) for query in queries))
+
+
+def stage_summary(agent) -> Dict[str, Dict[str, float]]:
+    """p50/p95 per pipeline stage from the agent's metrics."""
+    stages = {}
+    for histogram in agent.metrics.snapshot()["histograms"]:
+        if histogram["name"] != "agent_stage_seconds":
+            continue
+        labels = histogram["labels"]
+        name = labels["stage"] + (f":{labels['tool']}" if "tool" in labels else "")
+        stages[name] = {"count": histogram["count"], "p50_s": round(histogram["p50"], 4),
+                        "p95_s": round(histogram["p95"], 4)}
+    return stages
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark Agent.execute_plan against local fake upstreams.")
+    parser.add_argument("--requests", type=int, default=200, help="Queries to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Queries in flight at once")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync", help="Agent or AsyncAgent")
+    parser.add_argument("--tool-workers", type=int, default=4, help="Concurrent tool calls per query")
+    parser.add_argument("--render-mode", default="llm", choices=["auto", "llm", "template"])
+    parser.add_argument("--speculative", action="store_true", help="Dispatch tools while the plan streams")
+    parser.add_argument("--llm-median", type=float, default=0.3, help="Fake LLM median latency, seconds")
+    parser.add_argument("--llm-p99", type=float, default=1.0, help="Fake LLM p99 latency, seconds")
+    parser.add_argument("--backup-llm-median", type=float,
+                        help="Also start a second fake LLM with this median latency and route across both")
+    parser.add_argument("--backup-llm-p99", type=float, default=1.0, help="Second fake LLM p99 latency, seconds")
+    parser.add_argument("--tool-median", type=float, default=0.05, help="Fake tool API median latency, seconds")
+    parser.add_argument("--tool-p99", type=float, default=0.3, help="Fake tool API p99 latency, seconds")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the query mix and latency sampling")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file")
+    parser.add_argument("--max-p95", type=float, help="Exit with status 1 if end-to-end p95 exceeds this")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    llm = FakeGroqServer(LatencyModel(args.llm_median, args.llm_p99), seed=args.seed)
+    upstreams = FakeToolServer(LatencyModel(args.tool_median, args.tool_p99), seed=args.seed)
+    llm.start()
+    upstreams.start()
+    os.environ.update({"GROQ_BASE_URL": llm.url, "GROQ_API_KEY": "benchmark", **upstreams.env()})
+    backup = None
+    if args.backup_llm_median is not None:
+        backup = FakeGroqServer(LatencyModel(args.backup_llm_median, args.backup_llm_p99), seed=args.seed + 1)
+        backup.start()
+        os.environ["LLM_BACKENDS"] = json.dumps([
+            {"name": "primary", "model": "benchmark", "base_url": llm.url, "max_retries": 0},
+            {"name": "backup", "model": "benchmark", "base_url": backup.url, "max_retries": 0},
+        ])
+
+    agent = build_agent(args)
+    logging.getLogger().setLevel(logging.WARNING)
+    queries = make_queries(args.requests, args.seed)
+
+    start = time.perf_counter()
+    if args.mode == "async":
+        outcomes = asyncio.run(run_async(agent, queries, args.concurrency))
+    else:
+        outcomes = run_sync(agent, queries, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    report = summarize([latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), elapsed)
+    report["config"] = {key: value for key, value in vars(args).items() if key != "json_path"}
+    report["stages"] = stage_summary(agent)
+    report["upstream_requests"] = {"llm": llm.requests, **upstreams.requests}
+    report["llm_routing"] = {"hedges": agent.llm.hedges, "hedges_skipped": agent.llm.hedges_skipped,
+                             "failovers": agent.llm.failovers}
+    if backup is not None:
+        report["upstream_requests"]["backup_llm"] = backup.requests
+        backup.stop()
+    llm.stop()
+    upstreams.stop()
+
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.max_p95 is not None and report["p95_s"] > args.max_p95:
+        print(f"p95 {report['p95_s']}s exceeds the {args.max_p95}s budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
-import os
 import re
-import groq
+import asyncio
 import json
 import logging
-from src.tool_registry import Tool
-from dotenv import load_dotenv, find_dotenv
-from typing import Any, Dict, List
- 
-load_dotenv(find_dotenv())
+from src.tool_registry import Tool, LazyTool
+from src.scheduler import ToolScheduler, AsyncToolScheduler, Schedule, AsyncSchedule
+from src.stream_json import ToolCallStreamParser
+from src.validation import ToolArgumentError
+from src.render import ResponseRenderer, Template
+from src.plan_cache import PlanCache, registry_fingerprint, validate_plan
+from src.usage import record_usage, stream_usage
+from src.rate_limit import RateLimiter
+from src.llm_backend import LLMRouter
+from src.metrics import Metrics, default_metrics
+from src.cache import TTLCache
+from src.config import load_config
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    # NumPy dominates import time; tool retrieval imports it on first use
+    from src.retrieval import ToolIndex
+
+load_config()
 
 
 logging.basicConfig(
@@ -16,31 +29,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
 
 class Agent:
-    def __init__(self):
-        self.tools: Dict[str, Tool] = {}
-        self.client = groq.Groq(
-            api_key=os.getenv("GROQ_API_KEY"), 
-            max_retries=3,
-            timeout=10.0
-        )
-
-    def add_tool(self, tool: Tool) -> None:
+    # Whether LLM backends are called through their async clients
+    asynchronous = False
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        tool_timeout: float = 30.0,
+        prompt_mode: str = "pretty",
+        include_examples: bool = True,
+        render_mode: str = "llm",
+        templates: Optional[Dict[str, Template]] = None,
+        plan_cache: Optional[PlanCache] = None,
+        speculative: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[Metrics] = None,
+        tool_top_k: Optional[int] = None,
+        llm: Optional[LLMRouter] = None
+    ):
+        self.tools: Dict[str, Union[Tool, LazyTool]] = {}
+        self.prompt_mode = prompt_mode
+        self.include_examples = include_examples
+        # One prompt per (mode, examples, offered tools); bounded since top-k subsets vary per query
+        self._prompt_cache = TTLCache(max_entries=256)
+        self.renderer = ResponseRenderer(render_mode, templates)
+        self.plan_cache = plan_cache
+        self.speculative = speculative
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics if metrics is not None else default_metrics
+        self.tool_top_k = tool_top_k
+        self._tool_index: Optional["ToolIndex"] = None
+        self._fingerprint: Optional[str] = None
+        self.llm = llm if llm is not None else LLMRouter.from_env(MODEL_NAME)
+        # Hedges and failovers are extra requests against the same budget
+        if self.llm.rate_limiter is None:
+            self.llm.rate_limiter = rate_limiter
+        self._register_llm_metrics()
+        self.scheduler = self._create_scheduler(max_workers, tool_timeout)
+
+    @property
+    def client(self) -> Any:
+        """Client of the first configured LLM backend, created on first use."""
+        return self.llm.backends[0].client(self.asynchronous)
+
+    @client.setter
+    def client(self, client: Any) -> None:
+        self.llm.backends[0].set_client(client, self.asynchronous)
+
+    def _register_llm_metrics(self) -> None:
+        for backend in self.llm.backends:
+            self.metrics.register("agent_llm_backend_seconds", backend.latency, backend=backend.name, kind="response")
+            self.metrics.register("agent_llm_backend_seconds", backend.first_chunk, backend=backend.name,
+                                  kind="first_chunk")
+        self.metrics.register_counter("agent_llm_hedges_total", lambda: self.llm.hedges)
+        self.metrics.register_counter("agent_llm_hedges_skipped_total", lambda: self.llm.hedges_skipped)
+        self.metrics.register_counter("agent_llm_failovers_total", lambda: self.llm.failovers)
+
+    def _create_scheduler(self, max_workers: int, tool_timeout: float) -> ToolScheduler:
+        return ToolScheduler(self.use_tool, max_workers=max_workers, timeout=tool_timeout)
+
+    def add_tool(self, tool: Union[Tool, LazyTool]) -> None:
         """Register a tool with the agent."""
         self.tools[tool.name] = tool
+        self.metrics.register("agent_tool_upstream_seconds", tool.latency, tool=tool.name)
+        # Coalescing ratio = coalesced / calls, for tools with single-flight upstream calls
+        self.metrics.register_counter("agent_tool_flight_calls_total",
+                                      lambda: tool.coalesce_stats().get("calls", 0), tool=tool.name)
+        self.metrics.register_counter("agent_tool_coalesced_total",
+                                      lambda: tool.coalesce_stats().get("coalesced", 0), tool=tool.name)
+        self._prompt_cache.clear()
+        self._tool_index = None
+        self._fingerprint = None
+
+    def registry_fingerprint(self) -> str:
+        """Hash of the registered tool schemas, used to key cached plans."""
+        if self._fingerprint is None:
+            self._fingerprint = registry_fingerprint(self.tools)
+        return self._fingerprint
 
     def get_available_tools(self) -> List[str]:
         """Get list of available tools descriptions."""
         return [f"{tool.name} - {tool.description}" for tool in self.tools.values()]
 
+    def tool_latency(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool upstream latency percentiles, circuit breaker state and coalescing ratio."""
+        return {name: tool.latency_stats() for name, tool in self.tools.items()}
+
     def use_tool(self, tool_name: str, **kwargs: Any) -> str:
         """Execute a tool with the given name and arguments"""
         if tool_name not in self.tools:
             return f"Error: Tool {tool_name} not found."
         
         tool = self.tools[tool_name]
-        return tool.func(**kwargs)
+        try:
+            kwargs = tool.validate(kwargs)
+        except ToolArgumentError as e:
+            return f"Error: Invalid arguments for {tool_name}: {str(e)}"
+        with self.metrics.span("tool", tool=tool_name):
+            return tool(**kwargs)
     
     def _clean_response(self, response: str) -> str:
         """Extract JSON from a markdown-style code block."""
@@ -49,8 +138,59 @@ class Agent:
             return match.group(1)
         return response  # fallback: try to parse raw text
     
-    def create_system_prompt(self) -> str:
-        """Create the system prompt for the LLM with available tools"""
+    def create_system_prompt(self, tools: Optional[List[str]] = None) -> str:
+        """
+        Create the system prompt for the LLM with available tools, rendered once per registry.
+
+        Args:
+            tools (Optional[List[str]]): Only describe these tools. Defaults to every registered tool.
+        """
+        key = (self.prompt_mode, self.include_examples, tuple(tools) if tools is not None else None)
+        prompt = self._prompt_cache.get(key)
+        if prompt is None:
+            prompt = self._render_system_prompt(self.prompt_mode, self.include_examples, tools)
+            self._prompt_cache.set(key, prompt)
+            stats = self.prompt_stats(prompt)
+            logger.info(f"Rendered {self.prompt_mode} system prompt: {stats['chars']} chars, ~{stats['tokens']} tokens")
+        return prompt
+
+    def prompt_stats(self, prompt: str = None) -> Dict[str, int]:
+        """Report the size of the system prompt in characters and estimated tokens."""
+        prompt = prompt if prompt is not None else self.create_system_prompt()
+        # Using rough estimate of 4 characters per token
+        return {"chars": len(prompt), "tokens": len(prompt) // 4}
+
+    def _render_system_prompt(self, mode: str, include_examples: bool, tools: Optional[List[str]] = None) -> str:
+        """Render the system prompt in "pretty" (indented) or "compact" (minified) form."""
+        tools_json = self._prompt_config(tools)
+        if not include_examples:
+            tools_json["response_format"].pop("examples")
+
+        if mode == "compact":
+            return (
+                "You are an AI assistant that helps users by providing direct answers or using tools when necessary. "
+                "Configuration, instructions and available tools as JSON:\n"
+                f"{json.dumps(tools_json, separators=(',', ':'), ensure_ascii=False)}\n"
+                "Respond with one valid JSON object following `response_format`, with no text, commentary or code "
+                "blocks around it. Use tools only when necessary; otherwise give a direct answer in the JSON format."
+            )
+        if mode != "pretty":
+            raise ValueError(f"Unknown prompt mode: {mode}")
+
+        return f"""
+            You are an AI assistant that helps users by providing direct answers or using tools when necessary.
+            Configuration, instructions, and available tools are provided in JSON format below:
+
+            {json.dumps(tools_json, indent=2)}
+
+            Always respond with a valid **JSON object** that strictly follows the `response_format` schema provided above. Do **not** include any explanation, introduction, or text outside the JSON object — return the JSON **only**.
+            Use tools **only when necessary** for answering the user's question. If no tool is needed, return a direct answer in the JSON format.
+            Do not wrap the JSON in code blocks or add commentary. Output must be valid JSON.
+        """
+
+    def _prompt_config(self, tools: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Build the configuration, tools and response format sent in the system prompt."""
+        offered = [self.tools[name] for name in tools] if tools is not None else list(self.tools.values())
         tools_json = {
             "role": "AI Assistant",
             "capabilities": [
@@ -61,7 +201,8 @@ class Agent:
             "instructions": [
                 "Use tools only when they are necessary for the task",
                 "If a query can be answered directly, respond with a simple message instead of using tools",
-                "When tools are needed, plan their usage efficiently to minimize tool calls"
+                "When tools are needed, plan their usage efficiently to minimize tool calls",
+                "Independent tool calls run in parallel; only declare depends_on when a call needs another call's output"
             ],
             "tools": [
                 {
@@ -75,7 +216,7 @@ class Agent:
                         for name, info in tool.parameters.items()
                     }
                 }
-                for tool in self.tools.values()
+                for tool in offered
             ],
             "response_format": {
                 "type": "json",
@@ -111,11 +252,22 @@ class Agent:
                                 },
                                 "args": {
                                     "type": "object",
-                                    "description": "parameters for the tool"
+                                    "description": "parameters for the tool, use \"{{id}}\" inside a string to insert the output of another call"
+                                },
+                                "id": {
+                                    "type": "string",
+                                    "description": "unique name of this call, needed only when other calls depend on it",
+                                    "optional": True
+                                },
+                                "depends_on": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "ids of calls whose output this call needs",
+                                    "optional": True
                                 }
                             }
                         },
-                        "description": "tools to call in sequence (when tools are needed)",
+                        "description": "tools to call (when tools are needed)",
                         "optional": True
                     }
                 },
@@ -172,80 +324,419 @@ class Agent:
                 ]
             }
         }
-        return f"""
-            You are an AI assistant that helps users by providing direct answers or using tools when necessary.
-            Configuration, instructions, and available tools are provided in JSON format below:
+        return tools_json
 
-            {json.dumps(tools_json, indent=2)}
+    def _select_tools(self, query: str) -> Optional[List[str]]:
+        """Top-k tools for the query, or None to offer the whole registry."""
+        if self.tool_top_k is None or len(self.tools) <= self.tool_top_k:
+            return None
+        if self._tool_index is None:
+            from src.retrieval import ToolIndex
+            self._tool_index = ToolIndex(self.tools)
+        return self._tool_index.select(query, self.tool_top_k)
 
-            Always respond with a valid **JSON object** that strictly follows the `response_format` schema provided above. Do **not** include any explanation, introduction, or text outside the JSON object — return the JSON **only**.
-            Use tools **only when necessary** for answering the user's question. If no tool is needed, return a direct answer in the JSON format.
-            Do not wrap the JSON in code blocks or add commentary. Output must be valid JSON.
-        """
-    def plan(self, query: str) -> Dict:
-        """Use LLM to create a plan for tool usage."""
-        messages = [
-            {"role": "system", "content": self.create_system_prompt()},
+    def _withheld(self, tool_call: Dict, offered: Optional[List[str]]) -> bool:
+        """True for a call to a registered tool that was left out of the prompt."""
+        name = tool_call.get("tool")
+        return offered is not None and name in self.tools and name not in offered
+
+    def _needs_all_tools(self, plan: Dict, offered: Optional[List[str]]) -> bool:
+        """True when the plan asks for a registered tool that was left out of the prompt."""
+        if offered is None or not plan.get("requires_tools"):
+            return False
+        # Unregistered (hallucinated) names would not be found with all tools offered either
+        missing = [call.get("tool") for call in plan.get("tool_calls", []) if self._withheld(call, offered)]
+        if missing:
+            logger.info(f"Plan requested tools outside the top-{self.tool_top_k} selection {missing}, "
+                        "re-planning with all tools")
+        return bool(missing)
+
+    def _plan_messages(self, query: str, tools: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Build the chat messages used for planning."""
+        return [
+            {"role": "system", "content": self.create_system_prompt(tools)},
             {"role": "user", "content": query}
         ]
-        response = self.client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=4096,
-        )
-        raw_content = response.choices[0].message.content
+
+    def _parse_plan(self, raw_content: str) -> Dict:
+        """Parse the planner output into a plan dict."""
         try:
             json_str = self._clean_response(raw_content)
             return json.loads(json_str)
         except json.JSONDecodeError:
             logger.error(f"Failed to parse JSON response: {raw_content}")
             raise ValueError("Failed to parse JSON response from LLM")
+
+    def _cached_plan(self, query: str) -> Optional[Dict]:
+        if self.plan_cache is None:
+            return None
+        return self.plan_cache.get(query, self.registry_fingerprint())
+
+    def _remember_plan(self, query: str, plan: Dict) -> None:
+        """Store a plan for repeated queries, but only if it is valid for the current registry."""
+        if self.plan_cache is not None and validate_plan(plan, self.tools):
+            self.plan_cache.set(query, self.registry_fingerprint(), plan)
+
+    def _summary_messages(self, plan: Dict, results: List[str]) -> List[Dict[str, str]]:
+        """Build the chat messages that turn tool results into a traveler-friendly answer."""
+        response = f"""
+            Thought: {plan['thought']}
+            Plan: {'. '.join(plan['plan'])}
+            Results: {'. '.join(results)}
+        """
+        return [
+            {"role": "system", "content": """Your AI assistant for Traveling, here are thought, plan and result. 
+                                             Change the message format for easy reading for travelers"""},
+            {"role": "user", "content": response}
+        ]
+
+    def _chat(self, messages: List[Dict[str, str]], stream: bool = False, stage: str = "plan") -> Any:
+        """Send a chat completion request to the LLM, within the rate limiter's budget."""
+        self.metrics.inc("agent_llm_requests_total", stage=stage)
+        reserved = self.rate_limiter.acquire(self.rate_limiter.estimate(messages)) if self.rate_limiter else 0
+        response = self.llm.create(messages, stream=stream, temperature=0.7, max_tokens=4096)
+        if stream:
+            return self._track_stream(response, reserved, stage)
+        self._record_usage(getattr(response, "usage", None), reserved, stage)
+        return response
+
+    def _record_usage(self, usage: Any, reserved: int, stage: str) -> None:
+        """Count a response's tokens and settle its rate-limit reservation."""
+        if usage is None:
+            return
+        record_usage(usage)
+        self.metrics.inc("agent_llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, stage=stage, kind="prompt")
+        self.metrics.inc("agent_llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0,
+                         stage=stage, kind="completion")
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile(reserved, getattr(usage, "total_tokens", None))
+
+    def _track_stream(self, chunks: Iterator[Any], reserved: int, stage: str) -> Iterator[Any]:
+        """Pass streamed chunks through, recording the usage reported at the end."""
+        for chunk in chunks:
+            self._record_usage(stream_usage(chunk), reserved, stage)
+            yield chunk
+
+    def plan(self, query: str) -> Dict:
+        """Use LLM to create a plan for tool usage."""
+        plan = self._cached_plan(query)
+        if plan is not None:
+            return plan
+        return self._plan_uncached(query)
+
+    def _plan_uncached(self, query: str) -> Dict:
+        """Plan with the top-k tools, falling back to all of them, and cache the result."""
+        offered = self._select_tools(query)
+        plan = self._plan_with_tools(query, offered)
+        if self._needs_all_tools(plan, offered):
+            plan = self._plan_with_tools(query, None)
+        self._remember_plan(query, plan)
+        return plan
+
+    def _plan_with_tools(self, query: str, tools: Optional[List[str]]) -> Dict:
+        response = self._chat(self._plan_messages(query, tools))
+        return self._parse_plan(response.choices[0].message.content)
+
+    def _plan_streaming(self, query: str, schedule: Schedule, tools: Optional[List[str]] = None) -> Dict:
+        """
+        Stream the planning completion and dispatch each tool call as soon as its JSON
+        object is complete, overlapping tool latency with the rest of the generation.
+        Dispatching stops at the first call to a registered tool that was not offered,
+        since the query is then re-planned with every tool; calls to unknown tools are
+        dispatched and resolve to the usual "not found" error.
+        """
+        parser = ToolCallStreamParser()
+        chunks = []
+        dispatching = True
+        for chunk in self._chat(self._plan_messages(query, tools), stream=True):
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if not content:
+                continue
+            chunks.append(content)
+            for tool_call in parser.feed(content):
+                dispatching = dispatching and not self._withheld(tool_call, tools)
+                if dispatching:
+                    schedule.add(tool_call)
+
+        plan = self._parse_plan("".join(chunks))
+        if dispatching:
+            self._reconcile_dispatched(plan, schedule.calls, schedule.add)
+        return plan
+
+    def _reconcile_dispatched(self, plan: Dict, dispatched: List[Dict], add: Callable[[Dict], int]) -> None:
+        """Dispatch calls the incremental parser missed, and make the plan match what actually ran."""
+        if not plan.get("requires_tools"):
+            return
+        for tool_call in plan["tool_calls"][len(dispatched):]:
+            add(tool_call)
+        plan["tool_calls"] = list(dispatched)
+
+    def _plan_and_dispatch(self, query: str) -> Tuple[Dict, Schedule]:
+        """Plan the query and start its tool calls, speculatively while the plan streams if enabled."""
+        schedule = self.scheduler.start()
+        with self.metrics.span("plan"):
+            # One cache lookup per query, shared by both planning paths
+            plan = self._cached_plan(query)
+            if plan is None and self.speculative:
+                offered = self._select_tools(query)
+                plan = self._plan_streaming(query, schedule, offered)
+                if not self._needs_all_tools(plan, offered):
+                    self._remember_plan(query, plan)
+                    return plan, schedule
+                # Calls already dispatched for the discarded plan finish unobserved
+                schedule = self.scheduler.start()
+                plan = self._plan_with_tools(query, None)
+                self._remember_plan(query, plan)
+            elif plan is None:
+                plan = self._plan_uncached(query)
+
+        if plan["requires_tools"]:
+            for tool_call in plan["tool_calls"]:
+                schedule.add(tool_call)
+        return plan, schedule
     
     def execute_plan(self, query: str) -> str:
         """Execute the full pipeline: Plan and execute tool"""
         try:
-            plan = self.plan(query)
-            if not plan["requires_tools"]:
-                return plan["direct_response"]
+            with self.metrics.span("total"):
+                plan, schedule = self._plan_and_dispatch(query)
+                if not plan["requires_tools"]:
+                    return plan["direct_response"]
+
+                # Independent tools run in parallel, results keep plan order
+                with self.metrics.span("tools"):
+                    results = schedule.results()
+                with self.metrics.span("summarize"):
+                    if self.renderer.use_template(plan, self.tools, results):
+                        return self.renderer.render(plan, results)
+                    model = self._chat(self._summary_messages(plan, results), stage="summarize")
+                    return model.choices[0].message.content
             
-        # Execute each tool in sequence
-            results = []
+        except Exception as e:
+            return f"Error executing plan: {str(e)}"
+
+    def execute_plan_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Execute the full pipeline, yielding events as soon as they are available.
+
+        Events are dicts with a "type" key:
+            - plan: the parsed plan ("plan")
+            - tool_result: a finished tool call ("index", "tool", "output"), in completion order
+            - token: a chunk of the final answer ("content")
+            - done: the complete final answer ("content")
+            - error: the pipeline failed ("message")
+
+        Only the plan and tool stages are timed here; later stages would include the
+        time the consumer spends between events.
+        """
+        try:
+            plan, schedule = self._plan_and_dispatch(query)
+            yield {"type": "plan", "plan": plan}
+            if not plan["requires_tools"]:
+                yield {"type": "token", "content": plan["direct_response"]}
+                yield {"type": "done", "content": plan["direct_response"]}
+                return
+
+            for index, output in schedule.iter_completed():
+                yield {"type": "tool_result", "index": index, "tool": plan["tool_calls"][index]["tool"], "output": output}
+
+            results = schedule.results()
+            if self.renderer.use_template(plan, self.tools, results):
+                answer = self.renderer.render(plan, results)
+                yield {"type": "token", "content": answer}
+                yield {"type": "done", "content": answer}
+                return
+
+            chunks = []
+            for chunk in self._chat(self._summary_messages(plan, results), stream=True, stage="summarize"):
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    chunks.append(content)
+                    yield {"type": "token", "content": content}
+            yield {"type": "done", "content": "".join(chunks)}
+
+        except Exception as e:
+            yield {"type": "error", "message": f"Error executing plan: {str(e)}"}
+
+
+class AsyncAgent(Agent):
+    """
+    Asyncio-native variant of Agent.
+
+    Uses the async LLM clients and awaits tool functions directly, so a single event
+    loop can serve many sessions concurrently. Synchronous tools still work; they are
+    run in the default thread pool.
+    """
+
+    asynchronous = True
+
+    def _create_scheduler(self, max_workers: int, tool_timeout: float) -> AsyncToolScheduler:
+        return AsyncToolScheduler(self.use_tool, max_concurrency=max_workers, timeout=tool_timeout)
+
+    async def use_tool(self, tool_name: str, **kwargs: Any) -> str:
+        """Execute a tool with the given name and arguments"""
+        if tool_name not in self.tools:
+            return f"Error: Tool {tool_name} not found."
+
+        tool = self.tools[tool_name]
+        try:
+            kwargs = tool.validate(kwargs)
+        except ToolArgumentError as e:
+            return f"Error: Invalid arguments for {tool_name}: {str(e)}"
+        with self.metrics.span("tool", tool=tool_name):
+            return await tool.acall(**kwargs)
+
+    async def _chat(self, messages: List[Dict[str, str]], stream: bool = False, stage: str = "plan") -> Any:
+        """Send a chat completion request to the LLM, within the rate limiter's budget."""
+        self.metrics.inc("agent_llm_requests_total", stage=stage)
+        reserved = 0
+        if self.rate_limiter is not None:
+            reserved = await self.rate_limiter.acquire_async(self.rate_limiter.estimate(messages))
+        response = await self.llm.acreate(messages, stream=stream, temperature=0.7, max_tokens=4096)
+        if stream:
+            return self._track_stream(response, reserved, stage)
+        self._record_usage(getattr(response, "usage", None), reserved, stage)
+        return response
+
+    async def _track_stream(self, chunks: AsyncIterator[Any], reserved: int, stage: str) -> AsyncIterator[Any]:
+        """Async variant of Agent._track_stream."""
+        async for chunk in chunks:
+            self._record_usage(stream_usage(chunk), reserved, stage)
+            yield chunk
+
+    async def plan(self, query: str) -> Dict:
+        """Use LLM to create a plan for tool usage."""
+        plan = self._cached_plan(query)
+        if plan is not None:
+            return plan
+        return await self._plan_uncached(query)
+
+    async def _plan_uncached(self, query: str) -> Dict:
+        """Plan with the top-k tools, falling back to all of them, and cache the result."""
+        offered = self._select_tools(query)
+        plan = await self._plan_with_tools(query, offered)
+        if self._needs_all_tools(plan, offered):
+            plan = await self._plan_with_tools(query, None)
+        self._remember_plan(query, plan)
+        return plan
+
+    async def _plan_with_tools(self, query: str, tools: Optional[List[str]]) -> Dict:
+        response = await self._chat(self._plan_messages(query, tools))
+        return self._parse_plan(response.choices[0].message.content)
+
+    async def _plan_streaming(self, query: str, schedule: AsyncSchedule, tools: Optional[List[str]] = None) -> Dict:
+        """Async variant of Agent._plan_streaming."""
+        parser = ToolCallStreamParser()
+        chunks = []
+        dispatching = True
+        async for chunk in await self._chat(self._plan_messages(query, tools), stream=True):
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if not content:
+                continue
+            chunks.append(content)
+            for tool_call in parser.feed(content):
+                dispatching = dispatching and not self._withheld(tool_call, tools)
+                if dispatching:
+                    schedule.add(tool_call)
+
+        plan = self._parse_plan("".join(chunks))
+        if dispatching:
+            self._reconcile_dispatched(plan, schedule.calls, schedule.add)
+        return plan
+
+    async def _plan_and_dispatch(self, query: str) -> Tuple[Dict, AsyncSchedule]:
+        """Plan the query and start its tool calls, speculatively while the plan streams if enabled."""
+        schedule = self.scheduler.start()
+        with self.metrics.span("plan"):
+            # One cache lookup per query, shared by both planning paths
+            plan = self._cached_plan(query)
+            if plan is None and self.speculative:
+                offered = self._select_tools(query)
+                plan = await self._plan_streaming(query, schedule, offered)
+                if not self._needs_all_tools(plan, offered):
+                    self._remember_plan(query, plan)
+                    return plan, schedule
+                # Calls already dispatched for the discarded plan finish unobserved
+                schedule = self.scheduler.start()
+                plan = await self._plan_with_tools(query, None)
+                self._remember_plan(query, plan)
+            elif plan is None:
+                plan = await self._plan_uncached(query)
+
+        if plan["requires_tools"]:
             for tool_call in plan["tool_calls"]:
-                tool_name = tool_call["tool"]
-                tool_args = tool_call["args"]
-                result = self.use_tool(tool_name, **tool_args)
-                results.append(result)
-            
-            # Combine results
-            response = f"""
-                Thought: {plan['thought']}
-                Plan: {'. '.join(plan['plan'])}
-                Results: {'. '.join(results)}
-            """
-            messages = [
-                {"role": "system", "content": """Your AI assistant for Traveling, here are thought, plan and result. 
-                                                 Change the message format for easy reading for travelers"""},
-                {"role": "user", "content": response}
-            ]
-            model = self.client.chat.completions.create(
-                model="meta-llama/llama-4-scout-17b-16e-instruct",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=4096,
-            )
-            return model.choices[0].message.content
-            
+                schedule.add(tool_call)
+        return plan, schedule
+
+    async def execute_plan(self, query: str) -> str:
+        """Execute the full pipeline: Plan and execute tool"""
+        try:
+            with self.metrics.span("total"):
+                plan, schedule = await self._plan_and_dispatch(query)
+                if not plan["requires_tools"]:
+                    return plan["direct_response"]
+
+                with self.metrics.span("tools"):
+                    results = await schedule.results()
+                with self.metrics.span("summarize"):
+                    if self.renderer.use_template(plan, self.tools, results):
+                        return self.renderer.render(plan, results)
+                    model = await self._chat(self._summary_messages(plan, results), stage="summarize")
+                    return model.choices[0].message.content
+
         except Exception as e:
             return f"Error executing plan: {str(e)}"
+
+    async def execute_plan_stream(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Async variant of Agent.execute_plan_stream, yielding the same events."""
+        try:
+            plan, schedule = await self._plan_and_dispatch(query)
+            yield {"type": "plan", "plan": plan}
+            if not plan["requires_tools"]:
+                yield {"type": "token", "content": plan["direct_response"]}
+                yield {"type": "done", "content": plan["direct_response"]}
+                return
+
+            results = [None] * len(plan["tool_calls"])
+            async for index, output in schedule.iter_completed():
+                results[index] = output
+                yield {"type": "tool_result", "index": index, "tool": plan["tool_calls"][index]["tool"], "output": output}
+
+            if self.renderer.use_template(plan, self.tools, results):
+                answer = self.renderer.render(plan, results)
+                yield {"type": "token", "content": answer}
+                yield {"type": "done", "content": answer}
+                return
+
+            chunks = []
+            async for chunk in await self._chat(self._summary_messages(plan, results), stream=True, stage="summarize"):
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    chunks.append(content)
+                    yield {"type": "token", "content": content}
+            yield {"type": "done", "content": "".join(chunks)}
+
+        except Exception as e:
+            yield {"type": "error", "message": f"Error executing plan: {str(e)}"}
+
+    async def execute_many(self, queries: List[str], concurrency: int = 10) -> List[str]:
+        """Run many queries concurrently, at most `concurrency` at a time. Results keep input order."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query: str) -> str:
+            async with semaphore:
+                return await self.execute_plan(query)
+
+        return await asyncio.gather(*(run(query) for query in queries))
+
             
 def main():
-    from src.tools import convert_currency, get_weather, tavily_search
+    from src.tool_catalog import load_catalog
     
-    agent = Agent()
-    agent.add_tool(convert_currency)
-    agent.add_tool(get_weather)
-    agent.add_tool(tavily_search)
+    agent = Agent(plan_cache=PlanCache.from_env(), rate_limiter=RateLimiter.from_env())
+    # convert_currency, get_weather and tavily_search, imported on first use
+    for tool in load_catalog():
+        agent.add_tool(tool)
     query_list = [
         # "Saya akan traveling ke jepang, saya memiliki 100000 rupiah, berapa yen saya akan dapat?",
         # "I am traveling to Japan from Serbia, I have 1500 of local currency, how much of Japaese currency will I be able to get?",
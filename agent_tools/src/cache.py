@@ -0,0 +1,196 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+def sizeof_json(value: Any) -> int:
+    """Approximate the memory footprint of a value by its UTF-8 JSON size."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+class SqliteStore:
+    """
+    Persistent key/value backing for TTLCache in a local SQLite file.
+
+    Values are stored as JSON together with their expiry time, so entries survive a
+    restart but still honour the TTL they were written with. The file can be shared
+    by several worker processes (WAL mode). With ``max_entries`` set, the least
+    recently used rows are deleted once the table grows past that size.
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_entries: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+            self._conn.execute(f"DELETE FROM {table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                               (time.time(),))
+
+    def get(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Return (value, expires_at) or (_MISSING, None) if absent or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_entries is not None:
+                with self._conn:
+                    self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        if row is None or (row[1] is not None and row[1] <= now):
+            return _MISSING, None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time())
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with TTL expiry and LRU eviction.
+
+    Capacity can be bounded by number of entries, by total size in bytes (as measured
+    by ``sizeof``), or both. An optional SqliteStore acts as a second tier: writes go
+    to both, and memory misses are served from disk when possible. Keys must be
+    strings when a store is used.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = sizeof_json,
+        store: Optional[SqliteStore] = None
+    ):
+        """
+        Args:
+            ttl (Optional[float]): Seconds an entry stays valid. None means no expiry.
+            max_entries (Optional[int]): Maximum number of entries kept in memory
+            max_bytes (Optional[int]): Memory budget for all entries, in bytes
+            sizeof (Callable[[Any], int]): Measures the size of a value in bytes
+            store (Optional[SqliteStore]): Persistent second tier
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.store = store
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+        if self.store is not None:
+            value, expires_at = self.store.get(key)
+            if value is not _MISSING:
+                with self._lock:
+                    self.hits += 1
+                    self._insert(key, value, expires_at)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self.store is not None:
+            self.store.set(key, value, expires_at)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus current occupancy."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+        }
+
+    def _insert(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never cache a single value larger than the whole budget
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._over_capacity():
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _over_capacity(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+
+class SingleFlight:
+    """
+    Deduplicates identical calls that are in flight at the same time.
+
+    The first caller for a key (the leader) runs the call; callers arriving before it
+    finishes wait for and share its result, or its exception. A flight is a
+    ``concurrent.futures.Future``, so threads and asyncio tasks (on any loop) can
+    join the same one. Completed results are not kept, that is the cache's job.
+
+    An asyncio leader runs the call as a separate task: cancelling the caller that
+    started it does not cancel the shared call under the other waiters.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The flight for ``key`` and whether the caller leads it."""
+        with self._lock:
+            self.calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            # A running future cannot be cancelled, so one waiter giving up leaves the rest alone
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            del self._flights[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run ``func`` unless a call for ``key`` is already in flight, then share its outcome."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result=result)
+        return result
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaitable ``do`` for coroutine functions."""
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(func())
+            # The event loop only keeps weak references to tasks
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._land_task, key, future))
+        return await asyncio.wrap_future(future)
+
+    def _land_task(self, key: Hashable, future: Future, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        error = asyncio.CancelledError() if task.cancelled() else task.exception()
+        self._land(key, future, result=None if error is not None else task.result(), error=error)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls seen, calls served by another caller's flight, and their ratio."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+            "ratio": self.coalesced / self.calls if self.calls else 0.0,
+        }
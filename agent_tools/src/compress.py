@@ -0,0 +1,106 @@
+import re
+from typing import List
+import numpy as np
+from src.retrieval import bm25_scores
+
+# Sentence ends, or line breaks between paragraphs / list items
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+# Same estimate the rate limiter uses; Groq does not expose its tokenizer
+CHARS_PER_TOKEN = 4
+
+# Marks where passages were dropped
+GAP = "..."
+
+# Page text beyond this is cut before compressing; relevant content is rarely that deep
+MAX_INPUT_CHARS = 100_000
+
+
+def count_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_passages(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Split page text into sentences, cutting any longer than ``max_chars`` at word boundaries.
+
+    Scraped pages often contain run-on navigation or table text with no punctuation,
+    which would otherwise make one passage too large to ever fit a budget.
+    """
+    passages = []
+    for sentence in _BOUNDARY.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            passages.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            passages.append(sentence)
+    return passages
+
+
+def compress(
+    text: str,
+    query: str,
+    max_tokens: int,
+    min_relevance: float = 0.25,
+    max_input_chars: int = MAX_INPUT_CHARS
+) -> str:
+    """
+    Keep the passages of ``text`` most relevant to ``query`` within ``max_tokens``.
+
+    Passages are ranked by BM25 against the query and taken greedily, best first,
+    skipping any that no longer fit; the kept ones are joined in their original order,
+    with ``...`` marking each gap. Passages scoring below ``min_relevance`` times the
+    best score are dropped even if they fit, so a budget is a ceiling rather than a
+    target. Text already within budget is returned as is, and if no passage mentions a
+    query term the leading passages are kept. Only the first ``max_input_chars`` of
+    ``text`` are considered, which bounds the time spent on very large pages.
+
+    Args:
+        text (str): Page content to compress
+        query (str): Search query the content should answer
+        max_tokens (int): Token budget for the result, gap markers included
+        min_relevance (float): Fraction of the best passage score a passage needs to be kept
+        max_input_chars (int): Characters of ``text`` to consider
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    truncated = len(text) > max_input_chars
+    passages = split_passages(text[:max_input_chars])
+    if not passages:
+        return ""
+
+    scores = bm25_scores(passages, query)
+    # Stable sort: equal scores (including all zeros) keep document order
+    order = np.argsort(-scores, kind="stable")
+    # Each passage may be followed by a space and a gap marker
+    lengths = np.array([count_tokens(f"{passage} {GAP} ") for passage in passages])
+
+    budget = max_tokens
+    kept = []
+    floor = min_relevance * scores.max()
+    for index in order.tolist():
+        if scores[index] < floor:
+            break
+        if lengths[index] <= budget:
+            kept.append(index)
+            budget -= lengths[index]
+            if budget < lengths.min():
+                break
+    if not kept:
+        # Every relevant passage is larger than the whole budget
+        return text[:max_tokens * CHARS_PER_TOKEN - len(GAP)] + GAP
+    kept.sort()
+
+    parts = []
+    previous = -1
+    for index in kept:
+        if index != previous + 1:
+            parts.append(GAP)
+        parts.append(passages[index])
+        previous = index
+    if previous != len(passages) - 1 or truncated:
+        parts.append(GAP)
+    return " ".join(parts)
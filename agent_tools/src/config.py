@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_config() -> str:
+    """
+    Load the nearest .env file into the environment, once per process.
+
+    find_dotenv walks up the directory tree, which is measurable on a cold start, so
+    every entry point calls this instead of load_dotenv directly. Returns the path of
+    the file that was loaded, or "" if none was found.
+    """
+    from dotenv import load_dotenv, find_dotenv
+
+    path = find_dotenv()
+    if path:
+        load_dotenv(path)
+    return path
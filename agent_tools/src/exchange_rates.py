@@ -0,0 +1,136 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from src.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_URL = os.getenv("EXCHANGE_RATE_URL", "https://open.er-api.com/v6/latest")
+
+
+def fetch_rate_table(base: str) -> Dict[str, float]:
+    """Download the open.er-api.com rate table for a base currency."""
+    data = get_transport().get_json(f"{EXCHANGE_RATE_URL}/{base}")
+    if "rates" not in data:
+        raise ValueError(f"Unable to fetch exchange rates for {base}")
+    return data["rates"]
+
+
+class ExchangeRateCache:
+    """
+    Process-wide cache of a single exchange-rate table.
+
+    One table quoted against ``base`` is kept for ``ttl`` seconds and every currency
+    pair is derived from it by triangulation (``rate(A->B) = rates[B] / rates[A]``),
+    so any number of conversions costs at most one fetch per TTL window. Refreshes
+    are single-flight: concurrent callers on an expired table wait for one download
+    instead of each fetching, and callers holding a stale table are served it while
+    the refresh runs. If a refresh fails the previous table is served, and no refresh
+    is attempted again for ``retry_backoff`` seconds, doubling after each consecutive
+    failure up to ``max_retry_backoff``; without a previous table the last error is
+    raised until then.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        base: str = "USD",
+        fetch: Callable[[str], Dict[str, float]] = fetch_rate_table,
+        retry_backoff: float = 5.0,
+        max_retry_backoff: float = 300.0
+    ):
+        """
+        Args:
+            ttl (float): Seconds a downloaded table stays fresh
+            base (str): Currency the cached table is quoted against
+            fetch (Callable[[str], Dict[str, float]]): Returns the rate table for a base currency
+            retry_backoff (float): Seconds to wait after a failed refresh before the next one
+            max_retry_backoff (float): Upper bound of the doubling backoff
+        """
+        self.ttl = ttl
+        self.base = base.upper()
+        self.fetch = fetch
+        self._rates: Optional[Dict[str, float]] = None
+        self._fetched_at = 0.0
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._failures = 0
+        self._retry_at = 0.0
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def expired(self) -> bool:
+        return self._rates is None or time.monotonic() - self._fetched_at >= self.ttl
+
+    @property
+    def refresh_due(self) -> bool:
+        """Expired and not backing off after a failed refresh."""
+        return self.expired and time.monotonic() >= self._retry_at
+
+    def _cached(self) -> Dict[str, float]:
+        if self._rates is None:
+            raise self._error
+        self.hits += 1
+        return self._rates
+
+    def rates(self) -> Dict[str, float]:
+        """Return the cached rate table, refreshing it if the TTL elapsed."""
+        if not self.refresh_due:
+            return self._cached()
+
+        if self._rates is None:
+            self._lock.acquire()
+        elif not self._lock.acquire(blocking=False):
+            # Another thread is refreshing; the stale table will do meanwhile
+            return self._cached()
+        try:
+            # Another thread may have refreshed or failed while we waited for the lock
+            if not self.refresh_due:
+                return self._cached()
+            self.misses += 1
+            try:
+                self._rates = self.fetch(self.base)
+                self._fetched_at = time.monotonic()
+                self._failures = 0
+                self._retry_at = 0.0
+            except Exception as e:
+                self.errors += 1
+                self._failures += 1
+                backoff = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+                self._retry_at = time.monotonic() + backoff
+                self._error = e
+                if self._rates is None:
+                    raise
+                logger.warning(f"Exchange rate refresh failed, serving stale table for {backoff:.0f}s: {e}")
+            return self._rates
+        finally:
+            self._lock.release()
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Exchange rate from one currency to another, triangulated through the base.
+
+        Raises:
+            KeyError: If either currency is missing from the rate table
+        """
+        rates = self.rates()
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        from_rate = 1.0 if from_currency == self.base else rates[from_currency]
+        to_rate = 1.0 if to_currency == self.base else rates[to_currency]
+        return to_rate / from_rate
+
+    def invalidate(self) -> None:
+        """Drop the cached table so the next lookup fetches a new one."""
+        with self._lock:
+            self._rates = None
+            self._retry_at = 0.0
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
@@ -0,0 +1,422 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from functools import partial
+from itertools import chain
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from src.metrics import LatencyHistogram
+from src.rate_limit import RateLimiter
+from src.resilience import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+SDKS = ("groq", "openai")
+
+
+class Backend:
+    """
+    One OpenAI-compatible chat completions endpoint and the model served there.
+
+    ``sdk`` picks the client library: ``groq`` for Groq (``base_url`` defaults to the
+    Groq API), ``openai`` for any other OpenAI-compatible server, with ``base_url``
+    ending in ``/v1``. Clients are created on first use. Latency is tracked separately
+    for complete responses and for the first chunk of streamed ones.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        sdk: str = "groq",
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        if sdk not in SDKS:
+            raise ValueError(f"sdk must be one of {SDKS}, got {sdk!r}")
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.sdk = sdk
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.latency = LatencyHistogram()
+        self.first_chunk = LatencyHistogram()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._clients: Dict[bool, Any] = {}
+
+    def client(self, asynchronous: bool = False) -> Any:
+        if asynchronous not in self._clients:
+            self._clients[asynchronous] = self._create_client(asynchronous)
+        return self._clients[asynchronous]
+
+    def set_client(self, client: Any, asynchronous: bool = False) -> None:
+        """Use a ready-made client, e.g. a stub in tests."""
+        self._clients[asynchronous] = client
+
+    def _create_client(self, asynchronous: bool) -> Any:
+        # Both SDKs are slow to import, only load the one in use
+        if self.sdk == "groq":
+            import groq
+            client_class = groq.AsyncGroq if asynchronous else groq.Groq
+        else:
+            import openai
+            client_class = openai.AsyncOpenAI if asynchronous else openai.OpenAI
+        return client_class(api_key=self.api_key, base_url=self.base_url,
+                            max_retries=self.max_retries, timeout=self.timeout)
+
+    def _request(self, messages: List[Dict[str, str]], stream: bool, params: Dict[str, Any]) -> Dict[str, Any]:
+        request = {"model": self.model, "messages": messages, "stream": stream, **params}
+        if stream and self.sdk == "openai":
+            # Groq reports streamed usage on its own; OpenAI-compatible servers only on request
+            request["stream_options"] = {"include_usage": True}
+        return request
+
+    def create(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        return self.client().chat.completions.create(**self._request(messages, stream, params))
+
+    async def acreate(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        return await self.client(True).chat.completions.create(**self._request(messages, stream, params))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "latency": self.latency.snapshot(),
+            "first_chunk": self.first_chunk.snapshot(),
+        }
+
+
+def _close(stream: Any) -> None:
+    close = getattr(stream, "close", None)
+    if close is None:
+        return
+    result = close()
+    if asyncio.iscoroutine(result):
+        asyncio.ensure_future(result)
+
+
+class LLMRouter:
+    """
+    Sends chat completions to the fastest healthy of several backends.
+
+    Backends are tried in configured order until they have ``hedge_min_samples``
+    latency observations; from then on the ones with the lowest median latency go
+    first, and backends with an open circuit breaker are skipped. A request that fails
+    is retried on the next backend (failover). With ``hedge`` set, a request still
+    unanswered after the first backend's ``hedge_percentile`` latency is duplicated to
+    the next backend and the first answer wins. Requests that lost the race still run
+    to completion in the background, so their latency keeps being measured.
+
+    Streamed requests count as answered at their first chunk, and only that part is
+    hedged or failed over; an error later in the stream reaches the caller.
+
+    Sync requests that cannot be hedged (hedging off, too few samples yet, or no other
+    backend) run on the calling thread. Hedged ones run on the router's own pool of
+    ``max_workers`` threads, separate from the one guarding tool calls.
+
+    The caller reserves its request with the ``rate_limiter``; every further attempt
+    takes its own reservation. A failover waits for the budget, a hedge is skipped when
+    the limiter has no headroom for it right away.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        hedge: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        max_workers: int = 32,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.failovers = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_model: str) -> "LLMRouter":
+        """
+        Backends from ``LLM_BACKENDS``, a JSON list of objects with ``name``, ``model``
+        and optionally ``base_url``, ``api_key_env`` (name of the variable holding the
+        key), ``sdk``, ``timeout`` and ``max_retries``. Defaults to Groq with
+        ``default_model``. ``LLM_HEDGE``, ``LLM_HEDGE_PERCENTILE`` and
+        ``LLM_HEDGE_MIN_SAMPLES`` tune hedging, ``LLM_MAX_WORKERS`` sizes the pool
+        hedged sync requests run on.
+        """
+        specs = json.loads(os.getenv("LLM_BACKENDS") or "[]") or [{"name": "groq", "model": default_model}]
+        backends = []
+        for spec in specs:
+            spec = dict(spec)
+            api_key_env = spec.pop("api_key_env", "GROQ_API_KEY")
+            if spec.get("sdk", "groq") == "groq":
+                spec.setdefault("base_url", os.getenv("GROQ_BASE_URL"))
+            backends.append(Backend(api_key=os.getenv(api_key_env), **spec))
+        return cls(
+            backends,
+            hedge=os.getenv("LLM_HEDGE", "1").lower() not in ("0", "false", "no"),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", 0.95)),
+            hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20)),
+            max_workers=int(os.getenv("LLM_MAX_WORKERS", 32)),
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+        return self._executor
+
+    @staticmethod
+    def _next_allowed(queue: List[Backend]) -> Optional[Backend]:
+        """Pop backends off ``queue`` until one whose circuit lets a request through."""
+        while queue:
+            backend = queue.pop(0)
+            if backend.breaker.allow():
+                return backend
+        return None
+
+    def _next_hedge(self, queue: List[Backend], messages: List[Dict[str, str]]) -> Optional[Backend]:
+        """Next backend to hedge to, if there is one and the rate limiter has headroom for another request."""
+        if self.rate_limiter is None:
+            return self._next_allowed(queue)
+        reserved = self.rate_limiter.try_acquire(self.rate_limiter.estimate(messages))
+        if reserved is None:
+            self.hedges_skipped += 1
+            return None
+        backend = self._next_allowed(queue)
+        if backend is None:
+            self.rate_limiter.cancel(reserved)
+        return backend
+
+    def _next_failover(self, queue: List[Backend], messages: List[Dict[str, str]]) -> Optional[Backend]:
+        """Next backend to fail over to, once the rate limiter allows another request."""
+        backend = self._next_allowed(queue)
+        if backend is not None and self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.rate_limiter.estimate(messages))
+        return backend
+
+    async def _anext_failover(self, queue: List[Backend], messages: List[Dict[str, str]]) -> Optional[Backend]:
+        """Async variant of _next_failover."""
+        backend = self._next_allowed(queue)
+        if backend is not None and self.rate_limiter is not None:
+            try:
+                await self.rate_limiter.acquire_async(self.rate_limiter.estimate(messages))
+            except BaseException:
+                backend.breaker.release()
+                raise
+        return backend
+
+    def _histogram(self, backend: Backend, stream: bool) -> LatencyHistogram:
+        return backend.first_chunk if stream else backend.latency
+
+    def ranked(self, stream: bool = False) -> List[Backend]:
+        """Backends in the order requests try them."""
+        def key(position: int) -> Tuple[float, int]:
+            histogram = self._histogram(self.backends[position], stream)
+            if histogram.count < self.hedge_min_samples:
+                return float("inf"), position
+            return histogram.percentile(0.5), position
+        return [self.backends[position] for position in sorted(range(len(self.backends)), key=key)]
+
+    def _hedge_delay(self, backend: Backend, stream: bool) -> Optional[float]:
+        histogram = self._histogram(backend, stream)
+        if not self.hedge or histogram.count < self.hedge_min_samples:
+            return None
+        return histogram.percentile(self.hedge_percentile)
+
+    def _record(self, backend: Backend, stream: bool, start: float, error: Optional[BaseException]) -> None:
+        if error is None:
+            self._histogram(backend, stream).observe(time.perf_counter() - start)
+            backend.breaker.record_success()
+        else:
+            logger.warning(f"LLM backend {backend.name} failed: {error}")
+            backend.breaker.record_failure()
+
+    @staticmethod
+    def _first_chunk(stream: Any) -> Tuple[Any, Iterator[Any], Any]:
+        """Wait for the first chunk; returns it, the rest of the chunks and the stream to close."""
+        iterator = iter(stream)
+        return next(iterator, None), iterator, stream
+
+    def create(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        """Chat completion (or an iterator of chunks when streaming) from the first backend to answer."""
+        def call(backend: Backend) -> Any:
+            response = backend.create(messages, stream, **params)
+            return self._first_chunk(response) if stream else response
+
+        queue = self.ranked(stream)
+        first_backend = self._next_allowed(queue)
+        if first_backend is None:
+            raise CircuitOpenError("All LLM backends are temporarily unavailable (circuits open)")
+        delay = self._hedge_delay(first_backend, stream)
+        if delay is None or not queue:
+            return self._create_inline(first_backend, queue, messages, call, stream)
+
+        executor = self._get_executor()
+        first_start = time.perf_counter()
+        pending: Dict[Future, Tuple[Backend, float]] = {executor.submit(call, first_backend): (first_backend, first_start)}
+        error: Optional[BaseException] = None
+
+        def launch(backend: Optional[Backend]) -> bool:
+            if backend is None:
+                return False
+            pending[executor.submit(call, backend)] = (backend, time.perf_counter())
+            return True
+
+        try:
+            while pending:
+                wait_for = None
+                if delay is not None:
+                    wait_for = max(0.0, first_start + delay - time.perf_counter())
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                if not done:
+                    delay = None
+                    if launch(self._next_hedge(queue, messages)):
+                        self.hedges += 1
+                        logger.info(f"Hedging slow LLM backend {first_backend.name} after {wait_for:.3f}s")
+                    continue
+                for future in done:
+                    backend, start = pending.pop(future)
+                    error = future.exception()
+                    self._record(backend, stream, start, error)
+                    if error is None:
+                        return self._result(future.result(), stream)
+                if not pending and launch(self._next_failover(queue, messages)):
+                    self.failovers += 1
+                    # The failover is the request now; no hedging on the first backend's latency
+                    delay = None
+            raise error
+        finally:
+            for future, (backend, start) in pending.items():
+                future.add_done_callback(partial(self._settle_loser, backend, stream, start))
+
+    def _create_inline(
+        self,
+        backend: Backend,
+        queue: List[Backend],
+        messages: List[Dict[str, str]],
+        call: Any,
+        stream: bool
+    ) -> Any:
+        """Try backends one after another on the calling thread, failing over on errors."""
+        while True:
+            start = time.perf_counter()
+            try:
+                result = call(backend)
+            except Exception as e:
+                self._record(backend, stream, start, e)
+                backend = self._next_failover(queue, messages)
+                if backend is None:
+                    raise
+                self.failovers += 1
+                continue
+            self._record(backend, stream, start, None)
+            return self._result(result, stream)
+
+    def _settle_loser(self, backend: Backend, stream: bool, start: float, future: Any) -> None:
+        """Record a request that lost the race and release its stream."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        self._record(backend, stream, start, error)
+        if error is None and stream:
+            _close(future.result()[2])
+
+    @staticmethod
+    def _result(result: Any, stream: bool) -> Any:
+        if not stream:
+            return result
+        first, rest, _ = result
+        return rest if first is None else chain([first], rest)
+
+    async def acreate(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        """Awaitable ``create`` for async clients; streams are returned as async iterators."""
+        async def call(backend: Backend) -> Any:
+            response = await backend.acreate(messages, stream, **params)
+            if not stream:
+                return response
+            iterator = response.__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return first, iterator, response
+
+        queue = self.ranked(stream)
+        pending: Dict[asyncio.Task, Tuple[Backend, float]] = {}
+        error: Optional[BaseException] = None
+
+        def launch(backend: Optional[Backend]) -> bool:
+            if backend is None:
+                return False
+            pending[asyncio.ensure_future(call(backend))] = (backend, time.perf_counter())
+            return True
+
+        if not launch(self._next_allowed(queue)):
+            raise CircuitOpenError("All LLM backends are temporarily unavailable (circuits open)")
+        first_backend, first_start = next(iter(pending.values()))
+        delay = self._hedge_delay(first_backend, stream)
+        try:
+            while pending:
+                wait_for = None
+                if delay is not None:
+                    wait_for = max(0.0, first_start + delay - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    delay = None
+                    if launch(self._next_hedge(queue, messages)):
+                        self.hedges += 1
+                        logger.info(f"Hedging slow LLM backend {first_backend.name} after {wait_for:.3f}s")
+                    continue
+                for task in done:
+                    backend, start = pending.pop(task)
+                    error = task.exception()
+                    self._record(backend, stream, start, error)
+                    if error is None:
+                        return self._aresult(task.result(), stream)
+                if not pending and launch(await self._anext_failover(queue, messages)):
+                    self.failovers += 1
+                    delay = None
+            raise error
+        finally:
+            for task, (backend, start) in pending.items():
+                task.add_done_callback(partial(self._settle_loser, backend, stream, start))
+
+    @staticmethod
+    def _aresult(result: Any, stream: bool) -> Any:
+        if not stream:
+            return result
+
+        async def chunks() -> AsyncIterator[Any]:
+            first, rest, _ = result
+            if first is not None:
+                yield first
+            async for chunk in rest:
+                yield chunk
+        return chunks()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "hedges_skipped": self.hedges_skipped,
+            "failovers": self.failovers,
+            "backends": {backend.name: backend.stats() for backend in self.backends},
+        }
@@ -0,0 +1,207 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds, roughly log-spaced from 5ms to 1 minute
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe fixed-bucket latency histogram.
+
+    Recording is a bisect and two additions, cheap enough to stay on in production.
+    Percentiles are estimated by linear interpolation inside the matching bucket.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimate the p-th quantile (0 < p <= 1), or None if nothing was recorded."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = p * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if seen + bucket_count >= rank and bucket_count:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+                    lower = min(lower, upper)
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+            return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, count of observations <= bound) pairs, ending with +Inf."""
+        with self._lock:
+            counts = list(self.counts)
+        total = 0
+        pairs = []
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            total += bucket_count
+            pairs.append((bound, total))
+        return pairs
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary statistics: count, mean, p50, p95, p99 and max, in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50) or 0.0,
+            "p95": self.percentile(0.95) or 0.0,
+            "p99": self.percentile(0.99) or 0.0,
+            "max": self.max,
+        }
+
+
+# Spans of the query being handled in this thread / asyncio task, see trace()
+_current_trace: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("trace", default=None)
+
+
+@contextmanager
+def trace() -> Iterator[List[Dict[str, Any]]]:
+    """Collect every span finished inside the block, e.g. to log the breakdown of one query."""
+    spans: List[Dict[str, Any]] = []
+    token = _current_trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """
+    Registry of labelled latency histograms and counters.
+
+    Recording costs a dict lookup plus a histogram update, so it stays on in production.
+    ``to_prometheus`` renders the text exposition format for a /metrics endpoint and
+    ``snapshot`` (or ``to_json``) gives the same data with percentiles for logs.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Labels], LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: Dict[Tuple[str, Labels], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: Any) -> LatencyHistogram:
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def register(self, name: str, histogram: LatencyHistogram, **labels: Any) -> None:
+        """Export a histogram owned elsewhere, such as a tool's upstream latency."""
+        with self._lock:
+            self._histograms[(name, _labels(labels))] = histogram
+
+    def register_counter(self, name: str, read: Callable[[], float], **labels: Any) -> None:
+        """Export a counter kept elsewhere, such as a tool's coalesced calls, read at collection time."""
+        with self._lock:
+            self._collectors[(name, _labels(labels))] = read
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Time a pipeline stage into ``agent_stage_seconds`` and the current trace."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("agent_stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.histogram("agent_stage_seconds", stage=stage, **labels).observe(elapsed)
+            spans = _current_trace.get()
+            if spans is not None:
+                spans.append({"stage": stage, **labels, "seconds": round(elapsed, 6)})
+
+    def _read_counters(self) -> List[Tuple[Tuple[str, Labels], float]]:
+        with self._lock:
+            counters = list(self._counters.items())
+            collectors = list(self._collectors.items())
+        return counters + [(key, read()) for key, read in collectors]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+        counters = self._read_counters()
+        return {
+            "histograms": [
+                {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                for (name, labels), histogram in histograms
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        counters = sorted(self._read_counters())
+
+        lines = []
+        seen = set()
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in histogram.cumulative():
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by agents that are not given their own
+default_metrics = Metrics()
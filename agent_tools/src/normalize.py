@@ -0,0 +1,64 @@
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+DOUBLED_CONSONANT = re.compile(r"([bcdfghjklmnpqrstvwxz])\1(ing|ed|er)$")
+
+# Query parameters that only identify a campaign or click, never the page. Generic names
+# such as "ref" are left alone: sites use them for content (git refs, referral pages).
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "_hsenc", "_hsmi"})
+TRACKING_PREFIXES = ("utm_",)
+
+
+def _stem(word: str) -> str:
+    """Very light stemming: fold plurals and British doubled consonants (travelling -> traveling)."""
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    return DOUBLED_CONSONANT.sub(r"\1\2", word)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonicalize a user query for use as a cache key.
+
+    Case, accents, punctuation and whitespace are ignored and plural or spelling
+    variants are folded, so "Search article about traveling to Japan" and
+    "search articles about travelling to japan" normalize to the same string.
+    Word order is preserved because it changes meaning ("USD to EUR").
+    """
+    text = unicodedata.normalize("NFKD", query.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_stem(word) for word in WORD_PATTERN.findall(text))
+
+
+def normalize_exact(query: str) -> str:
+    """
+    Canonicalize a query without touching its values: only case and whitespace are ignored.
+
+    Digits, separators and operators are kept, so "1,500" and "1.500" or "2+2" and
+    "2-2" stay distinct. Use it where the key stands for concrete argument values.
+    """
+    return " ".join(query.casefold().split())
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL for deduplicating search results.
+
+    http and https, a ``www.`` prefix, host case, default ports, fragments, trailing
+    slashes, query parameter order and tracking parameters (``utm_*``, ``gclid``, ...)
+    are ignored, so links to the same page shared from different places compare equal.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+from src.cache import TTLCache, SqliteStore
+from src.normalize import normalize_exact
+from src.tool_registry import Tool
+from src.validation import ToolArgumentError
+
+logger = logging.getLogger(__name__)
+
+
+def registry_fingerprint(tools: Dict[str, Tool]) -> str:
+    """Hash of every registered tool schema; changes whenever a tool is added or altered."""
+    schemas = sorted(
+        [tool.name, tool.description, tool.parameters] for tool in tools.values()
+    )
+    return hashlib.sha256(json.dumps(schemas, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def validate_plan(plan: Dict, tools: Dict[str, Tool]) -> bool:
+    """Check that a plan is well formed and only calls registered tools with valid arguments."""
+    if not isinstance(plan, dict) or not isinstance(plan.get("requires_tools"), bool):
+        return False
+    if not plan["requires_tools"]:
+        return isinstance(plan.get("direct_response"), str)
+
+    tool_calls = plan.get("tool_calls")
+    if not isinstance(tool_calls, list) or not tool_calls:
+        return False
+    for tool_call in tool_calls:
+        tool = tools.get(tool_call.get("tool")) if isinstance(tool_call, dict) else None
+        if tool is None:
+            return False
+        try:
+            tool.validate(dict(tool_call.get("args", {})))
+        except ToolArgumentError:
+            return False
+    return True
+
+
+class PlanCache:
+    """
+    Cache of validated plans keyed by query (case and whitespace ignored) and tool-registry fingerprint.
+
+    Plans live in a per-process memory tier backed by a SQLite file that several
+    worker processes can share. Entries expire after ``ttl`` seconds and the file
+    keeps at most ``max_entries`` plans, evicting the least recently used.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600, max_entries: int = 10000, memory_entries: int = 1024):
+        """
+        Args:
+            path (str): SQLite file shared by all workers
+            ttl (float): Seconds a cached plan stays valid
+            max_entries (int): Maximum number of plans kept in the file
+            memory_entries (int): Maximum number of plans kept in process memory
+        """
+        self.cache = TTLCache(
+            ttl=ttl,
+            max_entries=memory_entries,
+            store=SqliteStore(path, table="plans", max_entries=max_entries)
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["PlanCache"]:
+        """Build a cache from PLAN_CACHE_* variables, or None when PLAN_CACHE_PATH is unset."""
+        path = os.getenv("PLAN_CACHE_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            ttl=float(os.getenv("PLAN_CACHE_TTL", 24 * 3600)),
+            max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", 10000)),
+        )
+
+    @staticmethod
+    def key(query: str, fingerprint: str) -> str:
+        # A plan holds concrete argument values, so amounts and operators must stay in the key
+        return hashlib.sha256(f"{fingerprint}:{normalize_exact(query)}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, fingerprint: str) -> Optional[Dict]:
+        return self.cache.get(self.key(query, fingerprint))
+
+    def set(self, query: str, fingerprint: str, plan: Dict) -> None:
+        self.cache.set(self.key(query, fingerprint), plan)
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
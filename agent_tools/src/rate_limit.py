@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], completion_tokens: int = 0) -> int:
+    """Rough token count of a chat request: 4 characters per prompt token plus the expected completion."""
+    chars = sum(len(message.get("content") or "") for message in messages)
+    return chars // 4 + completion_tokens
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at ``per_minute / 60`` units per second.
+
+    The level may go negative: a reservation always succeeds and returns how long the
+    caller must wait until the bucket would have covered it. Later reservations see the
+    deeper deficit and wait longer, which makes the order first come, first served.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> Tuple[float, float]:
+        """
+        Take ``amount``, capped at the capacity so oversized requests can still run.
+
+        Returns:
+            Tuple[float, float]: Delay in seconds before it may be spent, and the amount debited
+        """
+        self._refill(now)
+        debited = min(amount, self.capacity)
+        self.level -= debited
+        return (-self.level / self.rate if self.level < 0 else 0.0), debited
+
+    def fits(self, amount: float, now: float) -> bool:
+        """Whether ``amount`` (capped like ``reserve``) could be taken without waiting."""
+        self._refill(now)
+        return self.level >= min(amount, self.capacity)
+
+    def refund(self, amount: float, now: float) -> None:
+        """Give back (or with a negative amount, take) units after the real cost is known."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Client-side budget for requests and tokens per minute, shared by every LLM call.
+
+    ``acquire`` reserves one request and an estimated token count in arrival order and
+    blocks (or ``acquire_async`` sleeps) until both budgets allow it. After the response,
+    ``reconcile`` corrects the token bucket with the actual usage. One instance is safe
+    to share between threads and event loops.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        headroom: float = 0.95,
+        completion_tokens: int = 512
+    ):
+        """
+        Args:
+            requests_per_minute (Optional[float]): Provider request limit. None disables it.
+            tokens_per_minute (Optional[float]): Provider token limit. None disables it.
+            headroom (float): Fraction of each limit to use, staying just under the provider's
+            completion_tokens (int): Completion size assumed when estimating a request
+        """
+        self.requests = TokenBucket(requests_per_minute * headroom) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute * headroom) if tokens_per_minute else None
+        self.completion_tokens = completion_tokens
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimiter"]:
+        """Build a limiter from GROQ_RPM / GROQ_TPM, or None when neither is set."""
+        rpm = os.getenv("GROQ_RPM")
+        tpm = os.getenv("GROQ_TPM")
+        if not rpm and not tpm:
+            return None
+        return cls(
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            headroom=float(os.getenv("GROQ_RATE_HEADROOM", 0.95))
+        )
+
+    def estimate(self, messages: List[Dict[str, str]]) -> int:
+        return estimate_tokens(messages, self.completion_tokens)
+
+    def _reserve(self, tokens: int) -> Tuple[float, int]:
+        """Reserve a request and ``tokens``; returns the delay and the tokens actually debited."""
+        now = time.monotonic()
+        with self._lock:
+            delay = 0.0
+            if self.requests is not None:
+                delay, _ = self.requests.reserve(1, now)
+            if self.tokens is not None:
+                token_delay, debited = self.tokens.reserve(tokens, now)
+                delay = max(delay, token_delay)
+                tokens = int(debited)
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+        return delay, tokens
+
+    def cancel(self, tokens: int) -> None:
+        """Return a reservation that was never used."""
+        now = time.monotonic()
+        with self._lock:
+            if self.requests is not None:
+                self.requests.refund(1, now)
+            if self.tokens is not None:
+                self.tokens.refund(tokens, now)
+
+    def acquire(self, tokens: int) -> int:
+        """
+        Block until a request of ``tokens`` estimated tokens fits the budget.
+
+        Returns:
+            int: Tokens actually reserved, to pass to ``reconcile``
+        """
+        delay, tokens = self._reserve(tokens)
+        if delay > 0:
+            logger.debug(f"Rate limited, waiting {delay:.2f}s")
+            time.sleep(delay)
+        return tokens
+
+    async def acquire_async(self, tokens: int) -> int:
+        """Async variant of acquire; a cancelled waiter releases its reservation."""
+        delay, tokens = self._reserve(tokens)
+        if delay > 0:
+            logger.debug(f"Rate limited, waiting {delay:.2f}s")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancel(tokens)
+                raise
+        return tokens
+
+    def try_acquire(self, tokens: int) -> Optional[int]:
+        """
+        Reserve like ``acquire``, but only if that needs no wait; for requests that may be skipped, like hedges.
+
+        Returns:
+            Optional[int]: Tokens actually reserved, or None when nothing was reserved
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.requests is not None and not self.requests.fits(1, now):
+                return None
+            if self.tokens is not None and not self.tokens.fits(tokens, now):
+                return None
+            if self.requests is not None:
+                self.requests.reserve(1, now)
+            if self.tokens is not None:
+                _, debited = self.tokens.reserve(tokens, now)
+                tokens = int(debited)
+        return tokens
+
+    def reconcile(self, reserved: int, actual: Optional[int]) -> None:
+        """Correct the token budget once the response reports its real usage; ``reserved`` is what acquire returned."""
+        if self.tokens is None or actual is None:
+            return
+        with self._lock:
+            self.tokens.refund(reserved - actual, time.monotonic())
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "requests_available": self.requests.level if self.requests is not None else None,
+                "tokens_available": self.tokens.level if self.tokens is not None else None,
+            }
@@ -0,0 +1,65 @@
+from typing import Any, Callable, Dict, List, Optional
+from src.tool_registry import Tool
+
+# (tool call args, tool output) -> rendered text
+Template = Callable[[Dict[str, Any], str], str]
+
+RENDER_MODES = ("auto", "llm", "template")
+
+
+def default_template(args: Dict[str, Any], output: str) -> str:
+    """Simple tools already return traveler-readable text, so pass it through."""
+    return output.strip()
+
+
+class ResponseRenderer:
+    """
+    Decide how tool results become the final answer.
+
+    Modes:
+        - llm: always ask the LLM to rewrite the results (two LLM calls per query); the default
+        - auto: render deterministically when every call in the plan uses a tool
+                registered with ``simple=True``, otherwise fall back to the LLM
+        - template: render deterministically whenever every tool has a template,
+                    including per-tool templates for non-simple tools
+
+    Results containing a tool error always go through the LLM, so users never see raw
+    error strings.
+    """
+
+    def __init__(self, mode: str = "llm", templates: Optional[Dict[str, Template]] = None):
+        """
+        Args:
+            mode (str): One of "auto", "llm" or "template"
+            templates (Optional[Dict[str, Template]]): Per-tool templates by tool name
+        """
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {mode}")
+        self.mode = mode
+        self.templates = templates or {}
+
+    def use_template(self, plan: Dict, tools: Dict[str, Tool], results: List[str]) -> bool:
+        """Whether the plan's results can skip the LLM rewrite."""
+        if self.mode == "llm" or not plan.get("tool_calls"):
+            return False
+        # Tools and the scheduler report failures and timeouts as "Error..." strings
+        if any(isinstance(output, str) and output.startswith("Error") for output in results):
+            return False
+        for tool_call in plan["tool_calls"]:
+            tool = tools.get(tool_call.get("tool"))
+            if tool is None:
+                return False
+            if tool.simple:
+                continue
+            if self.mode == "template" and tool.name in self.templates:
+                continue
+            return False
+        return True
+
+    def render(self, plan: Dict, results: List[str]) -> str:
+        """Render each result with its tool's template, in plan order."""
+        sections = []
+        for tool_call, output in zip(plan["tool_calls"], results):
+            template = self.templates.get(tool_call.get("tool"), default_template)
+            sections.append(template(tool_call.get("args", {}), output))
+        return "\n\n".join(sections)
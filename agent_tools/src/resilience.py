@@ -0,0 +1,278 @@
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from src.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a tool call does not finish within its deadline budget."""
+
+
+class WorkersBusyError(DeadlineExceededError):
+    """Raised when a sync call waited its whole deadline for a free worker; not held against the upstream."""
+
+
+# Deadline (time.perf_counter) of the guarded call running in this context, if any.
+# Transports cap their timeouts with it, so an abandoned call does not hold its worker
+# for the full connect/read timeouts.
+call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current guarded call's deadline, or None outside one."""
+    deadline = call_deadline.get()
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """
+    Per-tool tail-latency policy.
+
+    Attributes:
+        timeout (Optional[float]): Deadline budget in seconds for one call, hedges included
+        failure_threshold (int): Consecutive failures that open the circuit breaker
+        reset_timeout (float): Seconds an open circuit waits before letting a trial call through
+        hedge (bool): Send one duplicate request if the first is slower than the hedge delay
+        hedge_percentile (float): Latency percentile used as the hedge delay
+        hedge_min_samples (int): Observations required before hedging is enabled
+        max_workers (int): Threads running this tool's sync calls; a stuck upstream can hold
+                           at most these, never the workers of other tools
+    """
+    timeout: Optional[float] = 10.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    hedge: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    max_workers: int = 16
+
+
+class CircuitBreaker:
+    """
+    Classic closed/open/half-open breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls fail
+    fast. Once ``reset_timeout`` elapsed a single trial call is allowed; its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Give up a trial call without an outcome, so the next call may probe again."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Resilience:
+    """
+    Applies a ResiliencePolicy to calls of one tool and records their latency.
+
+    Sync calls run on a pool owned by this tool, so they can be abandoned at their
+    deadline without starving other tools. The deadline starts once a worker picks the
+    call up; a call that never gets one is rejected without counting against the breaker.
+    """
+
+    def __init__(self, name: str, policy: ResiliencePolicy, latency: LatencyHistogram):
+        self.name = name
+        self.policy = policy
+        self.latency = latency
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self.hedges = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.policy.max_workers,
+                                                        thread_name_prefix=f"tool-{self.name}")
+        return self._executor
+
+    def _submit(self, func: Callable[[], Any]) -> Tuple[Future, threading.Event, List[float]]:
+        """Run ``func`` on the pool; returns its future, an event set once it starts and its start time."""
+        started = threading.Event()
+        started_at: List[float] = []
+
+        def run() -> Any:
+            started_at.append(time.perf_counter())
+            started.set()
+            if self.policy.timeout is not None:
+                call_deadline.set(started_at[0] + self.policy.timeout)
+            return func()
+
+        future = self._get_executor().submit(contextvars.copy_context().run, run)
+        return future, started, started_at
+
+    def _wait_for_worker(self, future: Future, started: threading.Event) -> None:
+        """Wait up to the deadline budget for the call to start; local queueing is not an upstream failure."""
+        if started.wait(self.policy.timeout) or not future.cancel():
+            return
+        self.rejected += 1
+        raise WorkersBusyError(f"{self.name} found no free worker within {self.policy.timeout}s")
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.policy.hedge or self.latency.count < self.policy.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.policy.hedge_percentile)
+
+    def _before(self) -> float:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable (circuit open)")
+        return time.perf_counter()
+
+    def _after(self, start: float, error: Optional[BaseException] = None) -> None:
+        # Only raised errors count against the breaker: "Error..." strings returned by a
+        # tool usually describe bad input (e.g. an unknown currency), not a sick upstream
+        self.latency.observe(time.perf_counter() - start)
+        if error is not None:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """Run a synchronous call under the breaker, deadline and hedging policy."""
+        self._before()
+        future, started, started_at = self._submit(func)
+        futures = [future]
+        try:
+            self._wait_for_worker(future, started)
+            started.wait()
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        start = started_at[0]
+        deadline = start + self.policy.timeout if self.policy.timeout is not None else None
+        try:
+            delay = self.hedge_delay()
+            while True:
+                remaining = deadline - time.perf_counter() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceededError(f"{self.name} exceeded its {self.policy.timeout}s deadline")
+                wait_for = remaining
+                if delay is not None and len(futures) == 1:
+                    hedge_in = start + delay - time.perf_counter()
+                    wait_for = hedge_in if remaining is None else min(remaining, hedge_in)
+                done, _ = wait(futures, timeout=max(0, wait_for) if wait_for is not None else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None or len(futures) == len(done):
+                        result = future.result()
+                        self._after(start)
+                        return result
+                    futures.remove(future)
+                if not done and delay is not None and len(futures) == 1 and time.perf_counter() - start >= delay:
+                    logger.info(f"Hedging slow {self.name} call after {delay:.3f}s")
+                    self.hedges += 1
+                    futures.append(self._submit(func)[0])
+                    delay = None
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                self._after(start, error=e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _spawn(self, func: Callable[[], Awaitable[Any]], start: float) -> asyncio.Task:
+        """Start an attempt as a task; tasks copy the current context, so transports see the deadline."""
+        token = call_deadline.set(start + self.policy.timeout if self.policy.timeout is not None else None)
+        try:
+            return asyncio.ensure_future(func())
+        finally:
+            call_deadline.reset(token)
+
+    async def call_async(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run an awaitable call under the breaker, deadline and hedging policy."""
+        start = self._before()
+        tasks = [self._spawn(func, start)]
+        try:
+            delay = self.hedge_delay()
+            while True:
+                remaining = None
+                if self.policy.timeout is not None:
+                    remaining = start + self.policy.timeout - time.perf_counter()
+                    if remaining <= 0:
+                        raise DeadlineExceededError(f"{self.name} exceeded its {self.policy.timeout}s deadline")
+                wait_for = remaining
+                if delay is not None and len(tasks) == 1:
+                    hedge_in = max(0, start + delay - time.perf_counter())
+                    wait_for = hedge_in if remaining is None else min(remaining, hedge_in)
+                done, _ = await asyncio.wait(tasks, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None or len(tasks) == len(done):
+                        result = task.result()
+                        self._after(start)
+                        return result
+                    tasks.remove(task)
+                if not done and delay is not None and len(tasks) == 1 and time.perf_counter() - start >= delay:
+                    logger.info(f"Hedging slow {self.name} call after {delay:.3f}s")
+                    self.hedges += 1
+                    tasks.append(self._spawn(func, start))
+                    delay = None
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                self._after(start, error=e)
+            raise
+        except BaseException:
+            # Cancelled (e.g. the caller gave up): no outcome, but a half-open trial must end
+            self.breaker.release()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
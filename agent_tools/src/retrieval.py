@@ -0,0 +1,101 @@
+from typing import Dict, List, Sequence
+import numpy as np
+from src.normalize import normalize_query
+from src.tool_registry import Tool
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-, accent- and plural-insensitive word tokens (``get_weather`` -> ``get``, ``weather``)."""
+    return normalize_query(text).split()
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a small, fixed document set, vectorized with NumPy.
+
+    Per-term weights are precomputed into a documents x vocabulary matrix at build time,
+    so scoring a query is a column gather and a row sum.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        tokenized = [tokenize(document) for document in documents]
+        self.vocabulary: Dict[str, int] = {
+            term: index for index, term in enumerate(sorted({term for tokens in tokenized for term in tokens}))
+        }
+        tf = np.zeros((len(tokenized), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for term in tokens:
+                tf[row, self.vocabulary[term]] += 1
+
+        lengths = tf.sum(axis=1)
+        average = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((len(tokenized) - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / average)
+        self.weights = tf * (k1 + 1) / (tf + norm[:, None]) * idf
+
+    def __len__(self) -> int:
+        return self.weights.shape[0]
+
+    def scores(self, query: str) -> np.ndarray:
+        columns = [self.vocabulary[term] for term in set(tokenize(query)) if term in self.vocabulary]
+        if not columns:
+            return np.zeros(len(self), dtype=np.float32)
+        return self.weights[:, columns].sum(axis=1)
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the ``k`` best-scoring documents, best first; ties keep document order."""
+        scores = self.scores(query)
+        order = np.argsort(-scores, kind="stable")
+        return order[:k].tolist()
+
+
+def bm25_scores(documents: Sequence[str], query: str, k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    BM25 scores of ``documents`` for one query, without building an index.
+
+    Each document is tokenized once and only the query terms are counted, so memory
+    stays linear in the text size. Scores match ``BM25Index(documents).scores(query)``.
+    """
+    terms = sorted(set(tokenize(query)))
+    column = {term: index for index, term in enumerate(terms)}
+    tf = np.zeros((len(documents), len(terms)), dtype=np.float32)
+    lengths = np.zeros(len(documents), dtype=np.float32)
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        lengths[row] = len(tokens)
+        for term in tokens:
+            index = column.get(term)
+            if index is not None:
+                tf[row, index] += 1
+    if not terms or not len(documents):
+        return np.zeros(len(documents), dtype=np.float32)
+
+    average = lengths.mean() if lengths.mean() > 0 else 1.0
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / average)
+    # Terms no document contains score zero, as they are absent from an index's vocabulary
+    return (tf * (k1 + 1) / (tf + norm[:, None]) * idf * (df > 0)).sum(axis=1)
+
+
+def tool_document(tool: Tool) -> str:
+    """Text a tool is retrieved by: its name, description and parameter names and docs."""
+    parts = [tool.name, tool.description]
+    for name, info in tool.parameters.items():
+        parts.append(name)
+        parts.append(info.get("description", ""))
+    return " ".join(parts)
+
+
+class ToolIndex:
+    """Selects the tools most relevant to a query, so prompts only describe those."""
+
+    def __init__(self, tools: Dict[str, Tool]):
+        self.names = list(tools)
+        self.index = BM25Index([tool_document(tool) for tool in tools.values()])
+
+    def select(self, query: str, k: int) -> List[str]:
+        """Names of the top-``k`` tools, in registry order so prompts stay stable."""
+        chosen = set(self.index.top_k(query, k))
+        return [name for position, name in enumerate(self.names) if position in chosen]
@@ -0,0 +1,339 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Matches placeholders such as "{{weather}}" inside string arguments.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([\w\-]+)\s*\}\}")
+
+
+def find_dependencies(index: int, tool_call: Dict[str, Any], ids: Dict[str, int]) -> List[int]:
+    """Return the plan indexes a tool call depends on, from depends_on and {{id}} placeholders."""
+    refs = [str(dep) for dep in tool_call.get("depends_on", []) or []]
+    for value in tool_call.get("args", {}).values():
+        if isinstance(value, str):
+            refs.extend(PLACEHOLDER_PATTERN.findall(value))
+
+    deps = []
+    for ref in refs:
+        if ref not in ids or ids[ref] >= index:
+            # Dependencies must point to earlier calls, otherwise they could cycle
+            logger.warning(f"Ignoring unknown dependency '{ref}' of tool call {index}")
+            continue
+        deps.append(ids[ref])
+    return deps
+
+
+def substitute_placeholders(args: Dict[str, Any], outputs: Dict[str, str]) -> Dict[str, Any]:
+    """Replace {{id}} placeholders in string arguments with the referenced call output."""
+    def replace(match: "re.Match") -> str:
+        return outputs.get(match.group(1), match.group(0))
+
+    return {
+        name: PLACEHOLDER_PATTERN.sub(replace, value) if isinstance(value, str) else value
+        for name, value in args.items()
+    }
+
+
+class ToolScheduler:
+    """
+    Run plan tool calls on a worker pool shared by every plan of an agent.
+
+    Independent tool calls run in parallel, at most ``max_workers`` at a time per plan;
+    the pool itself is sized for many concurrent plans (``TOOL_POOL_SIZE``). A tool call may declare an ``id`` and a
+    ``depends_on`` list of other call ids (or plan indexes); it is dispatched only
+    after those calls have finished. String arguments may reference the output of a
+    previous call with a ``{{id}}`` placeholder, which also implies a dependency.
+    Results are always returned in plan order.
+    """
+
+    def __init__(
+        self,
+        invoke: Callable[..., str],
+        max_workers: int = 4,
+        timeout: Optional[float] = 30.0,
+        pool_size: Optional[int] = None
+    ):
+        """
+        Args:
+            invoke (Callable[..., str]): Function called as ``invoke(tool_name, **args)``
+            max_workers (int): Maximum number of tool calls running at once per run
+            timeout (Optional[float]): Default per-call timeout in seconds, measured from
+                                       the moment the call starts running. None disables it.
+            pool_size (Optional[int]): Threads shared by all runs; defaults to TOOL_POOL_SIZE or 64
+        """
+        self.invoke = invoke
+        self.max_workers = max_workers
+        self.timeout = timeout
+        pool_size = pool_size or int(os.getenv("TOOL_POOL_SIZE", 64))
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="tool")
+
+    def run(self, tool_calls: List[Dict[str, Any]]) -> List[str]:
+        """Execute all tool calls and return their outputs in plan order."""
+        schedule = self.start()
+        for tool_call in tool_calls:
+            schedule.add(tool_call)
+        return schedule.results()
+
+    def start(self) -> "Schedule":
+        """Open a schedule that accepts tool calls incrementally."""
+        return Schedule(self)
+
+    def shutdown(self) -> None:
+        """Release the worker pool."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Schedule:
+    """
+    A single plan execution. Tool calls are added with ``add`` and dispatched as soon
+    as their dependencies are satisfied; ``results`` blocks until every call resolved.
+    Not thread-safe: ``add`` and ``results`` must be called from the same thread.
+    """
+
+    def __init__(self, scheduler: ToolScheduler):
+        self.scheduler = scheduler
+        self.calls: List[Dict[str, Any]] = []
+        self.outputs: Dict[int, str] = {}
+        self.failed: set = set()
+        self.ids: Dict[str, int] = {}
+        self.waiting: Dict[int, List[int]] = {}
+        self.running: Dict[Future, int] = {}
+        self.started: Dict[int, float] = {}
+
+    def add(self, tool_call: Dict[str, Any]) -> int:
+        """Queue a tool call, dispatching it immediately if it has no pending dependencies."""
+        index = len(self.calls)
+        self.calls.append(tool_call)
+        call_id = str(tool_call.get("id", index))
+        self.ids[call_id] = index
+        self.ids.setdefault(str(index), index)
+
+        self.waiting[index] = find_dependencies(index, tool_call, self.ids)
+        self._pump(block=False)
+        return index
+
+    def results(self) -> List[str]:
+        """Wait for every queued call and return outputs in plan order."""
+        for _ in self.iter_completed():
+            pass
+        return [self.outputs[i] for i in range(len(self.calls))]
+
+    def iter_completed(self) -> Iterator[Tuple[int, str]]:
+        """Yield (plan index, output) pairs in completion order until every queued call resolved."""
+        reported = 0
+        while True:
+            # outputs preserves insertion order, which is resolution order
+            resolved = list(self.outputs.items())
+            for index, output in resolved[reported:]:
+                yield index, output
+            reported = len(resolved)
+            if reported == len(self.calls):
+                return
+
+            if not self.running and not self._release():
+                # Remaining calls wait on something that will never finish
+                for index in list(self.waiting):
+                    del self.waiting[index]
+                    self._resolve(index, "Error: Unresolvable dependency for tool "
+                                         f"{self.calls[index].get('tool')}", failed=True)
+                continue
+            self._pump(block=True)
+
+    def _release(self) -> bool:
+        """
+        Dispatch waiting calls whose dependencies resolved, in plan order, while the run
+        has fewer than ``max_workers`` calls running. Returns True if any moved.
+        """
+        moved = False
+        for index, deps in list(self.waiting.items()):
+            if any(dep not in self.outputs for dep in deps):
+                continue
+            tool_call = self.calls[index]
+            failed = any(dep in self.failed for dep in deps)
+            if not failed and len(self.running) >= self.scheduler.max_workers:
+                continue
+            del self.waiting[index]
+            moved = True
+            if failed:
+                self._resolve(index, f"Error: Skipped {tool_call.get('tool')} because a dependency failed",
+                              failed=True)
+                continue
+            args = self._substitute(tool_call.get("args", {}))
+            # Run in the caller's context so per-query traces and usage see the tool call
+            context = contextvars.copy_context()
+            future = self.scheduler.executor.submit(context.run, self._execute, index, tool_call["tool"], args)
+            self.running[future] = index
+        return moved
+
+    def _substitute(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        outputs = {ref: self.outputs[index] for ref, index in self.ids.items() if index in self.outputs}
+        return substitute_placeholders(args, outputs)
+
+    def _execute(self, index: int, tool_name: str, args: Dict[str, Any]) -> str:
+        self.started[index] = time.monotonic()
+        return self.scheduler.invoke(tool_name, **args)
+
+    def _deadline(self, index: int, now: float) -> Optional[float]:
+        timeout = self.calls[index].get("timeout", self.scheduler.timeout)
+        if timeout is None:
+            return None
+        # A call still queued for a pool thread cannot expire before it would if it started now
+        return self.started.get(index, now) + float(timeout)
+
+    def _pump(self, block: bool) -> None:
+        """Collect finished calls, expire timed out ones and dispatch what became ready."""
+        while True:
+            self._release()
+            if not self.running:
+                return
+
+            wait_for = 0
+            if block:
+                now = time.monotonic()
+                deadlines = [d for d in (self._deadline(i, now) for i in self.running.values()) if d is not None]
+                # Wake at the earliest pending deadline, including calls that have not started yet
+                wait_for = max(0, min(deadlines) - now) if deadlines else None
+            done, _ = wait(list(self.running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = self.running.pop(future)
+                tool_name = self.calls[index].get("tool")
+                try:
+                    self._resolve(index, future.result())
+                except Exception as e:
+                    logger.error(f"Tool {tool_name} failed: {e}")
+                    self._resolve(index, f"Error executing {tool_name}: {str(e)}", failed=True)
+
+            now = time.monotonic()
+            expired = False
+            for future, index in list(self.running.items()):
+                deadline = self._deadline(index, now)
+                if deadline is not None and now >= deadline:
+                    # The worker thread cannot be interrupted; its result is discarded
+                    del self.running[future]
+                    future.cancel()
+                    tool_name = self.calls[index].get("tool")
+                    logger.warning(f"Tool {tool_name} timed out")
+                    self._resolve(index, f"Error: Tool {tool_name} timed out", failed=True)
+                    expired = True
+
+            if not block or done or expired:
+                self._release()
+                return
+
+    def _resolve(self, index: int, output: str, failed: bool = False) -> None:
+        self.outputs[index] = output if isinstance(output, str) else str(output)
+        if failed:
+            self.failed.add(index)
+
+
+class AsyncToolScheduler:
+    """
+    Asyncio counterpart of ToolScheduler with the same plan semantics.
+
+    Each tool call becomes a task that first awaits its dependencies, then runs
+    under a semaphore bounding the number of concurrent tool invocations.
+    """
+
+    def __init__(
+        self,
+        invoke: Callable[..., Awaitable[str]],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = 30.0
+    ):
+        """
+        Args:
+            invoke (Callable[..., Awaitable[str]]): Coroutine function called as ``invoke(tool_name, **args)``
+            max_concurrency (int): Maximum number of tool calls running at once per run
+            timeout (Optional[float]): Default per-call timeout in seconds. None disables it.
+        """
+        self.invoke = invoke
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    async def run(self, tool_calls: List[Dict[str, Any]]) -> List[str]:
+        """Execute all tool calls and return their outputs in plan order."""
+        return await self.start(tool_calls).results()
+
+    def iter_completed(self, tool_calls: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, str]]:
+        """Execute all tool calls, yielding (plan index, output) pairs in completion order."""
+        return self.start(tool_calls).iter_completed()
+
+    def start(self, tool_calls: Iterable[Dict[str, Any]] = ()) -> "AsyncSchedule":
+        """Open a schedule that accepts tool calls incrementally. Must be called inside the event loop."""
+        schedule = AsyncSchedule(self)
+        for tool_call in tool_calls:
+            schedule.add(tool_call)
+        return schedule
+
+
+class AsyncSchedule:
+    """
+    A single plan execution on the event loop. Each added tool call becomes a task that
+    first awaits its dependencies, then runs under the scheduler's concurrency limit.
+    """
+
+    def __init__(self, scheduler: AsyncToolScheduler):
+        self.scheduler = scheduler
+        self.semaphore = asyncio.Semaphore(scheduler.max_concurrency)
+        self.calls: List[Dict[str, Any]] = []
+        self.tasks: List[asyncio.Task] = []
+        self.ids: Dict[str, int] = {}
+        self.outputs: Dict[str, str] = {}
+
+    def add(self, tool_call: Dict[str, Any]) -> int:
+        """Queue a tool call; it starts as soon as its dependencies finished."""
+        index = len(self.calls)
+        self.calls.append(tool_call)
+        self.ids[str(tool_call.get("id", index))] = index
+        self.ids.setdefault(str(index), index)
+        deps = find_dependencies(index, tool_call, self.ids)
+        self.tasks.append(asyncio.ensure_future(self._execute(index, tool_call, deps)))
+        return index
+
+    async def results(self) -> List[str]:
+        """Wait for every queued call and return outputs in plan order."""
+        return [output for output, _ in await asyncio.gather(*self.tasks)]
+
+    async def iter_completed(self) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (plan index, output) pairs in completion order until every queued call resolved."""
+        pending = {task: index for index, task in enumerate(self.tasks)}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()[0]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _execute(self, index: int, tool_call: Dict[str, Any], deps: List[int]) -> Tuple[str, bool]:
+        tool_name = tool_call.get("tool")
+        resolved = await asyncio.gather(*(self.tasks[dep] for dep in deps))
+        if any(failed for _, failed in resolved):
+            return f"Error: Skipped {tool_name} because a dependency failed", True
+
+        args = substitute_placeholders(tool_call.get("args", {}), self.outputs)
+        timeout = tool_call.get("timeout", self.scheduler.timeout)
+        async with self.semaphore:
+            try:
+                output = await asyncio.wait_for(self.scheduler.invoke(tool_name, **args), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {tool_name} timed out")
+                return f"Error: Tool {tool_name} timed out", True
+            except Exception as e:
+                logger.error(f"Tool {tool_name} failed: {e}")
+                return f"Error executing {tool_name}: {str(e)}", True
+
+        output = output if isinstance(output, str) else str(output)
+        for ref, ref_index in self.ids.items():
+            if ref_index == index:
+                self.outputs[ref] = output
+        return output, False
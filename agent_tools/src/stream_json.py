@@ -0,0 +1,95 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCallStreamParser:
+    """
+    Incrementally scan a streamed plan and emit each ``tool_calls[i]`` object as soon
+    as it is syntactically complete.
+
+    Only the structure needed to find the top-level ``tool_calls`` array is tracked
+    (string/escape state, nesting and the current object key), so each character is
+    inspected once regardless of how the text is chunked. Text before the first ``{``
+    such as a markdown code fence is ignored.
+    """
+
+    def __init__(self, key: str = "tool_calls"):
+        self.key = key
+        self.text = ""
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string: Optional[str] = None
+        self.current_key: Optional[str] = None
+        self.array_depth: Optional[int] = None
+        self.item_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk and return tool calls completed by it."""
+        completed = []
+        offset = len(self.text)
+        self.text += text
+        if self.done:
+            return completed
+
+        for index, char in enumerate(text, offset):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = self._decode(self.text[self.string_start:index + 1])
+                continue
+
+            if char == '"':
+                if self.stack:
+                    self.in_string = True
+                    self.string_start = index
+            elif char == ":":
+                if self.stack == ["{"]:
+                    self.current_key = self.last_string
+            elif char in "{[":
+                if self.array_depth is not None and len(self.stack) == self.array_depth and char == "{":
+                    self.item_start = index
+                if char == "[" and self.stack == ["{"] and self.current_key == self.key:
+                    self.array_depth = len(self.stack) + 1
+                self.stack.append(char)
+            elif char in "}]":
+                if not self.stack:
+                    continue
+                self.stack.pop()
+                if char == "}" and self.item_start is not None and len(self.stack) == self.array_depth:
+                    item = self._load(self.text[self.item_start:index + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self.item_start = None
+                elif char == "]" and self.array_depth is not None and len(self.stack) == self.array_depth - 1:
+                    self.array_depth = None
+                if not self.stack:
+                    self.done = True
+                    break
+
+        return completed
+
+    @staticmethod
+    def _decode(literal: str) -> Optional[str]:
+        try:
+            return json.loads(literal)
+        except json.JSONDecodeError:
+            return None
+
+    @staticmethod
+    def _load(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(fragment)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed streamed tool call: {fragment}")
+            return None
+        return item if isinstance(item, dict) and "tool" in item else None
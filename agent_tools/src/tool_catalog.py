@@ -0,0 +1,60 @@
+"""
+Declarations of the built-in tools, loadable without importing their implementations.
+
+The schemas live in tool_catalog.json next to this file. After changing a tool's
+signature or docstring, refresh them from the implementations with:
+
+    python -m src.tool_catalog
+"""
+import os
+import json
+import importlib
+from typing import Any, Dict, List
+from src.tool_registry import LazyTool
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "tool_catalog.json")
+
+
+def load_catalog(asynchronous: bool = False, path: str = CATALOG_PATH) -> List[LazyTool]:
+    """
+    Declare every catalogued tool without importing it.
+
+    Args:
+        asynchronous (bool): Use the awaitable implementations, for AsyncAgent
+        path (str): Catalog file to read
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return [
+        LazyTool(
+            name=entry["name"],
+            description=entry["description"],
+            parameters=entry["parameters"],
+            target=entry["async_target" if asynchronous else "target"],
+            simple=entry.get("simple", False),
+        )
+        for entry in entries
+    ]
+
+
+def _resolve(target: str) -> Any:
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def refresh_catalog(path: str = CATALOG_PATH) -> List[Dict[str, Any]]:
+    """Rewrite each entry's schema from its (imported) sync implementation."""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries:
+        tool = _resolve(entry["target"])
+        entry.update(name=tool.name, description=tool.description, parameters=tool.parameters, simple=tool.simple)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return entries
+
+
+if __name__ == "__main__":
+    for entry in refresh_catalog():
+        print(f"{entry['name']}: {entry['target']}, {entry['async_target']}")
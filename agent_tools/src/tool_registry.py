@@ -1,7 +1,27 @@
+import json
+import time
+import asyncio
 import inspect
-from typing import Callable, Any, Dict, get_type_hints
-from dataclasses import dataclass
+import logging
+import importlib
+import threading
+from functools import cached_property, partial
+from typing import Callable, Any, Dict, Hashable, Optional, get_type_hints
+from dataclasses import dataclass, field, replace
 from typing import _GenericAlias
+from src.cache import TTLCache
+from src.validation import compile_validator
+from src.metrics import LatencyHistogram
+from src.resilience import Resilience, ResiliencePolicy
+from src.coalesce import SingleFlight
+
+_MISSING = object()
+
+# Tools report failures as "Error..." strings, or "Sorry, ..." when the upstream answered
+# without usable data; neither may be served from cache
+FAILURE_PREFIXES = ("Error", "Sorry")
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -10,10 +30,227 @@ class Tool:
     description: str
     func: Callable[..., str]
     parameters: Dict[str, Dict[str, str]]
+    inject: Dict[str, Callable[[], Any]] = field(default_factory=dict)
+    cache: Optional[TTLCache] = None
+    cache_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None
+    validator: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    simple: bool = False
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    resilience: Optional[Resilience] = None
+    coalesce: Optional[SingleFlight] = None
+
+    def validate(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check and coerce LLM-produced arguments before the tool is invoked.
+
+        Raises:
+            ToolArgumentError: If arguments are unknown, missing or of the wrong type
+        """
+        return self.validator(kwargs) if self.validator is not None else kwargs
 
     def __call__(self, *args, **kwargs) -> str:
-        return self.func(*args, **kwargs)
-    
+        if self.cache is None and self.coalesce is None:
+            return self._invoke(args, kwargs)
+
+        key = self._make_cache_key(args, kwargs)
+        if self.cache is not None:
+            result = self.cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        if self.coalesce is None:
+            return self._fetch(key, args, kwargs)
+        return self.coalesce.do(key, partial(self._fetch, key, args, kwargs))
+
+    def _fetch(self, key: Hashable, args: tuple, kwargs: Dict[str, Any]) -> str:
+        """Invoke the tool and cache the result; runs once per flight when coalescing."""
+        result = self._invoke(args, kwargs)
+        if self.cache is not None:
+            self._remember(key, result)
+        return result
+
+    def _invoke(self, args: tuple, kwargs: Dict[str, Any]) -> str:
+        """Call the underlying function, under the resilience policy if one is set."""
+        call = partial(self.func, *args, **self._with_injected(kwargs))
+        if self.resilience is not None:
+            return self.resilience.call(call)
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self.latency.observe(time.perf_counter() - start)
+
+    def invalidate(self, *args, **kwargs) -> None:
+        """Drop the cached result for these arguments, or the whole cache if none are given."""
+        if self.cache is None:
+            return
+        if args or kwargs:
+            self.cache.delete(self._make_cache_key(args, kwargs))
+        else:
+            self.cache.clear()
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters of the tool's result cache."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        """Calls and coalesced calls of the tool's single-flight group."""
+        return self.coalesce.stats() if self.coalesce is not None else {}
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Upstream latency percentiles, plus breaker state, hedges and coalescing when enabled."""
+        stats = self.latency.snapshot()
+        if self.resilience is not None:
+            stats["circuit"] = self.resilience.breaker.state
+            stats["hedges"] = self.resilience.hedges
+            stats["rejected"] = self.resilience.rejected
+        if self.coalesce is not None:
+            stats["coalesced_ratio"] = self.coalesce.stats()["ratio"]
+        return stats
+
+    @cached_property
+    def _signature(self) -> inspect.Signature:
+        return inspect.signature(self.func)
+
+    def _make_cache_key(self, args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+        """Canonicalize arguments so positional, keyword and defaulted calls share an entry."""
+        bound = self._signature.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {
+            name: value for name, value in bound.arguments.items()
+            if name not in self.inject
+        }
+        if self.cache_key is not None:
+            return self.cache_key(arguments)
+        return json.dumps(arguments, sort_keys=True, default=str)
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        if isinstance(result, str) and result.startswith(FAILURE_PREFIXES):
+            return
+        self.cache.set(key, result)
+
+    def _with_injected(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Add shared dependencies (e.g. the HTTP transport) the caller did not pass."""
+        for param_name, provider in self.inject.items():
+            if param_name not in kwargs:
+                kwargs[param_name] = provider()
+        return kwargs
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.func)
+
+    async def acall(self, *args, **kwargs) -> str:
+        """Await the tool, running synchronous functions in a worker thread."""
+        key = None
+        if self.cache is not None or self.coalesce is not None:
+            key = self._make_cache_key(args, kwargs)
+        if self.cache is not None:
+            result = self.cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        if self.coalesce is None:
+            return await self._afetch(key, args, kwargs)
+        return await self.coalesce.do_async(key, partial(self._afetch, key, args, kwargs))
+
+    async def _afetch(self, key: Optional[Hashable], args: tuple, kwargs: Dict[str, Any]) -> str:
+        call_kwargs = self._with_injected(dict(kwargs))
+        if self.is_async:
+            call = partial(self.func, *args, **call_kwargs)
+        else:
+            call = partial(asyncio.to_thread, self.func, *args, **call_kwargs)
+
+        if self.resilience is not None:
+            result = await self.resilience.call_async(call)
+        else:
+            start = time.perf_counter()
+            try:
+                result = await call()
+            finally:
+                self.latency.observe(time.perf_counter() - start)
+
+        if self.cache is not None:
+            self._remember(key, result)
+        return result
+
+
+class LazyTool:
+    """
+    Tool declared by name and schema whose implementation is imported on first use.
+
+    The agent only needs a tool's name, description and parameters to build prompts,
+    so a registry of LazyTools costs nothing at import time. The target module (and
+    the client libraries it pulls in) is imported the first time the tool is
+    validated or called. ``target`` is ``"package.module:attribute"`` naming a Tool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        parameters: Dict[str, Dict[str, str]],
+        target: str,
+        simple: bool = False
+    ):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.target = target
+        self.simple = simple
+        self.latency = LatencyHistogram()
+        self._tool: Optional[Tool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+
+    def load(self) -> Tool:
+        """Import the implementation, once."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    module_name, _, attribute = self.target.partition(":")
+                    tool = getattr(importlib.import_module(module_name), attribute)
+                    if [tool.name, tool.description, tool.parameters] != [self.name, self.description, self.parameters]:
+                        logger.warning(f"Declared schema of {self.name} differs from {self.target}; "
+                                       "regenerate the tool catalog")
+                    self._tool = self._adopt(tool)
+        return self._tool
+
+    def _adopt(self, tool: Tool) -> Tool:
+        """Copy of the loaded tool that records into this declaration's latency histogram."""
+        resilience = None
+        if tool.resilience is not None:
+            resilience = Resilience(tool.name, tool.resilience.policy, self.latency)
+        return replace(tool, latency=self.latency, resilience=resilience)
+
+    def validate(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return self.load().validate(kwargs)
+
+    def __call__(self, *args, **kwargs) -> str:
+        return self.load()(*args, **kwargs)
+
+    async def acall(self, *args, **kwargs) -> str:
+        return await self.load().acall(*args, **kwargs)
+
+    @property
+    def is_async(self) -> bool:
+        return self.load().is_async
+
+    def invalidate(self, *args, **kwargs) -> None:
+        if self._tool is not None:
+            self._tool.invalidate(*args, **kwargs)
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self._tool.cache_stats() if self._tool is not None else {}
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        return self._tool.coalesce_stats() if self._tool is not None else {}
+
+    def latency_stats(self) -> Dict[str, Any]:
+        return self._tool.latency_stats() if self._tool is not None else self.latency.snapshot()
+
+
 def parse_docstring_params(docstring: str) -> Dict[str, str]:
     """Extract parameter descriptions from docstring."""
     if not docstring:
@@ -57,8 +294,48 @@ def get_type_description(type_hint: Any) -> str:
         if type_hint._name == 'Literal':
             return f"one of {type_hint.__args__}"
     return type_hint.__name__
+
+
+def _transport_provider(is_async: bool) -> Callable[[], Any]:
+    """Provide the shared HTTP transport matching the tool's calling convention."""
+    def provide() -> Any:
+        from src.transport import get_async_transport, get_transport
+        return get_async_transport() if is_async else get_transport()
+    return provide
+
+
+# Parameters filled in by the registry instead of the LLM
+INJECTED_PARAMS = {
+    "transport": _transport_provider,
+}
+
     
-def tool(name: str = None):
+def tool(
+    name: str = None,
+    cache_ttl: Optional[float] = None,
+    cache_size: Optional[int] = None,
+    cache_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    simple: bool = False,
+    resilience: Optional[ResiliencePolicy] = None,
+    coalesce: Optional[SingleFlight] = None
+):
+    """
+    Register a function as a tool.
+
+    Args:
+        name (str, optional): Tool name shown to the LLM. Defaults to the function name.
+        cache_ttl (Optional[float]): Memoize results for this many seconds
+        cache_size (Optional[int]): Memoize at most this many results, evicting least recently used
+        cache_key (Optional[Callable]): Maps the canonical argument dict to a cache (and coalescing) key.
+                                        Defaults to the arguments serialized as sorted JSON.
+        simple (bool): The tool returns final, traveler-readable text that can be shown
+                       without an LLM rewrite
+        resilience (Optional[ResiliencePolicy]): Deadline, circuit breaker and hedging
+                                                 applied to each upstream call
+        coalesce (Optional[SingleFlight]): Concurrent calls with the same key share one
+                                           upstream call. Pass the same group to a tool's
+                                           sync and async variants to share flights.
+    """
     def decorator(func: Callable[..., str]) -> Tool:
         tool_name = name or func.__name__
         description = inspect.getdoc(func) or "No description available"
@@ -68,17 +345,30 @@ def tool(name: str = None):
         sig = inspect.signature(func)
         
         params = {}
+        inject = {}
         for param_name, param in sig.parameters.items():
+            if param_name in INJECTED_PARAMS:
+                inject[param_name] = INJECTED_PARAMS[param_name](inspect.iscoroutinefunction(func))
+                continue
             params[param_name] = {
                 "type": get_type_description(type_hints.get(param_name, Any)),
                 "description": param_docs.get(param_name, "No description available")
             }
         
+        latency = LatencyHistogram()
         return Tool(
             name=tool_name,
             description=description.split('\n\n')[0],
             func=func,
-            parameters=params
+            parameters=params,
+            inject=inject,
+            validator=compile_validator(sig, type_hints, skip=inject),
+            cache=TTLCache(ttl=cache_ttl, max_entries=cache_size) if cache_ttl or cache_size else None,
+            cache_key=cache_key,
+            simple=simple,
+            latency=latency,
+            resilience=Resilience(tool_name, resilience, latency) if resilience is not None else None,
+            coalesce=coalesce
         )
     return decorator
 
@@ -1,62 +1,64 @@
 import os
 import json
-from typing import Dict, List, Any, Union
-from dotenv import load_dotenv, find_dotenv
-import requests
-import urllib.request
-from tavily import TavilyClient
+import asyncio
+from itertools import chain
+from typing import Dict, Iterator, List, Any, Optional, Union
 from src.tool_registry import tool
+from src.transport import HttpTransport, AsyncHttpTransport
+from src.exchange_rates import ExchangeRateCache
+from src.cache import TTLCache, SqliteStore
+from src.normalize import normalize_exact, normalize_query, normalize_url
+from src.resilience import ResiliencePolicy
+from src.coalesce import SingleFlight
+from src.config import load_config
 
-load_dotenv(find_dotenv())
+load_config()
 
+WEATHER_URL = os.getenv("WEATHER_URL", "https://api.weatherstack.com/current")
+TAVILY_SEARCH_URL = os.getenv("TAVILY_SEARCH_URL", "https://api.tavily.com/search")
 
-@tool()
-def convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
-    """
-    Convert currency using the latest exchange rates.
+# One USD table serves every currency pair, refreshed at most once per TTL
+rate_cache = ExchangeRateCache(ttl=float(os.getenv("EXCHANGE_RATE_TTL", 3600)))
 
-    Parameters:
-        - amount: Amount to convert
-        - from_currency: Source currency code (e.g., USD)
-        - to_currency: Target currency code (e.g., EUR)  
-    """
-    try:
-        url = f"https://open.er-api.com/v6/latest/{from_currency.upper()}"
-        with urllib.request.urlopen(url) as response:
-            data = json.loads(response.read())
+# Formatted search results keyed by query (case and whitespace ignored), optionally persisted to disk
+search_cache = TTLCache(
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", 3600)),
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    store=SqliteStore(os.getenv("SEARCH_CACHE_PATH"), table="search") if os.getenv("SEARCH_CACHE_PATH") else None
+)
 
-        if "rates" not in data:
-            return f"Error: Unable to fetch exchange rates for {from_currency.upper()}"
-        
-        exchange_rate = data["rates"].get(to_currency.upper())
-        if not exchange_rate:
-            return f"Error: No exchange rate found for {to_currency.upper()}"
-        
-        converted_amount = amount * exchange_rate
-        return (
-            f"Exchange rate from {from_currency.upper()} to {to_currency.upper()}: {exchange_rate:.4f}\n"
-            f"{amount} {from_currency.upper()} is equivalent to {converted_amount:.2f} {to_currency.upper()}"
-        )
-    except Exception as e:
-        return f"Error Converting Currency: {str(e)}"
+# Deadline budgets per upstream. Weather lookups are cheap and idempotent, so a call
+# slower than the observed p95 is hedged with a duplicate request.
+CURRENCY_POLICY = ResiliencePolicy(timeout=float(os.getenv("CURRENCY_TIMEOUT", 5)))
+WEATHER_POLICY = ResiliencePolicy(timeout=float(os.getenv("WEATHER_TIMEOUT", 5)), hedge=True)
+SEARCH_POLICY = ResiliencePolicy(timeout=float(os.getenv("SEARCH_TIMEOUT", 15)))
 
-@tool()
-def get_weather(city: str) -> str:
-    """
-    Get weather information for a specific city.
+# Page content kept per search source, as the passages most relevant to the query
+SEARCH_SOURCE_TOKENS = int(os.getenv("SEARCH_SOURCE_TOKENS", 512))
 
-    Parameters:
-        - city: The name of the city to get the weather information for (e.g., "New York")
-    """
-    url = "https://api.weatherstack.com/current"
-    params = {
-        "access_key": os.getenv('WHEATER_API_KEY'),
-        "query": city
-    }
+# Sessions asking for the same city or search at the same moment share one upstream
+# request; the sync and async variants join the same flights. Currency conversions
+# need none, their only upstream call is the rate table refresh, already single-flight.
+WEATHER_FLIGHTS = SingleFlight()
+SEARCH_FLIGHTS = SingleFlight()
+
+
+def _convert(amount: float, from_currency: str, to_currency: str) -> str:
+    """Convert using the shared rate table cache."""
+    try:
+        exchange_rate = rate_cache.rate(from_currency, to_currency)
+    except KeyError as e:
+        return f"Error: No exchange rate found for {e.args[0]}"
+    
+    converted_amount = amount * exchange_rate
+    return (
+        f"Exchange rate from {from_currency.upper()} to {to_currency.upper()}: {exchange_rate:.4f}\n"
+        f"{amount} {from_currency.upper()} is equivalent to {converted_amount:.2f} {to_currency.upper()}"
+    )
 
-    response = requests.get(url, params=params)
-    data = response.json()
 
+def _format_weather(city: str, data: Dict[str, Any]) -> str:
+    """Format a weatherstack current-weather response."""
     location = data.get("location", {})
     current = data.get("current", {})
     
@@ -81,11 +83,74 @@ def get_weather(city: str) -> str:
         f"- UV Index: {uv_index}/10\n"
         f"- Sunrise: {sunrise}, Sunset: {sunset}"
     )
-@tool()
+
+
+def _format_search(result: Dict[str, Any], fetch_full_page: bool, query: str) -> str:
+    """Format a Tavily search response with deduplicated content and a source list."""
+    if not result:
+        return "Sorry, I couldn't find any relevant information."
+    clean_raw_response = deduplicate_and_format_sources(
+        result, max_tokens_per_source=SEARCH_SOURCE_TOKENS, fetch_full_page=fetch_full_page, query=query
+    )
+    source = format_sources(result)
+    return (
+        f"Raw Response: {clean_raw_response}\n"
+        f"Source:\n{source}"
+    )
+
+
+@tool(simple=True, resilience=CURRENCY_POLICY)
+def convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
+    """
+    Convert currency using the latest exchange rates.
+
+    Parameters:
+        - amount: Amount to convert
+        - from_currency: Source currency code (e.g., USD)
+        - to_currency: Target currency code (e.g., EUR)  
+    """
+    # Upstream failures raise, so the circuit breaker sees them; the scheduler reports them
+    return _convert(amount, from_currency, to_currency)
+
+def _search_cache_key(query: str, fetch_full_page: bool, max_results: int) -> str:
+    """Cache key for a search: only case and whitespace are ignored, so "C++" and "C#" stay distinct."""
+    return json.dumps([normalize_exact(query), max_results, fetch_full_page])
+
+
+def _tavily_request(query: str, fetch_full_page: bool, max_results: int) -> Dict[str, Any]:
+    """Build the Tavily search request arguments."""
+    return {
+        "payload": {
+            "query": query,
+            "max_results": max_results,
+            "include_raw_content": fetch_full_page
+        },
+        "headers": {"Authorization": f"Bearer {os.getenv('TAVILY_API_KEY')}"}
+    }
+
+
+@tool(cache_ttl=600, cache_size=256, cache_key=lambda args: normalize_query(args["city"]), simple=True,
+      resilience=WEATHER_POLICY, coalesce=WEATHER_FLIGHTS)
+def get_weather(city: str, transport: HttpTransport) -> str:
+    """
+    Get weather information for a specific city.
+
+    Parameters:
+        - city: The name of the city to get the weather information for (e.g., "New York")
+    """
+    params = {
+        "access_key": os.getenv('WHEATER_API_KEY'),
+        "query": city
+    }
+
+    return _format_weather(city, transport.get_json(WEATHER_URL, params=params))
+
+@tool(cache_key=lambda args: _search_cache_key(**args), resilience=SEARCH_POLICY, coalesce=SEARCH_FLIGHTS)
 def tavily_search(
         query: str, 
         fetch_full_page: bool = True, 
-        max_results: int = 3
+        max_results: int = 3,
+        transport: HttpTransport = None
     ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Use tools when user asks for information that is not in the knowledge base.
@@ -96,33 +161,155 @@ def tavily_search(
                                          Defaults to True.
         - max_results (int, optional): Maximum number of results to return. Defaults to 3.
     """
-     
-    tavily_client = TavilyClient(api_key=os.getenv('TAVILY_API_KEY'))
-    result = tavily_client.search(
-        query, 
-        max_results=max_results, 
-        include_raw_content=fetch_full_page
-    )
-    if not result:
-        return "Sorry, I couldn't find any relevant information."
-    clean_raw_response = deduplicate_and_format_sources(result, max_tokens_per_source=4096, fetch_full_page=fetch_full_page)
-    source = format_sources(result)
-    return (
-        f"Raw Response: {clean_raw_response}\n"
-        f"Source:\n{source}"
-    )
+    key = _search_cache_key(query, fetch_full_page, max_results)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = transport.post_json(TAVILY_SEARCH_URL, **_tavily_request(query, fetch_full_page, max_results))
+    output = _format_search(result, fetch_full_page, query)
+    if result:
+        search_cache.set(key, output)
+    return output
+
+
+# Awaitable variants registered under the same names, for use with AsyncAgent
+
+@tool(name="convert_currency", simple=True, resilience=CURRENCY_POLICY)
+async def async_convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
+    """
+    Convert currency using the latest exchange rates.
+
+    Parameters:
+        - amount: Amount to convert
+        - from_currency: Source currency code (e.g., USD)
+        - to_currency: Target currency code (e.g., EUR)  
+    """
+    if rate_cache.refresh_due:
+        # Only a refresh blocks, keep it off the event loop
+        return await asyncio.to_thread(_convert, amount, from_currency, to_currency)
+    return _convert(amount, from_currency, to_currency)
+
+@tool(name="get_weather", cache_ttl=600, cache_size=256, cache_key=lambda args: normalize_query(args["city"]),
+      simple=True, resilience=WEATHER_POLICY, coalesce=WEATHER_FLIGHTS)
+async def async_get_weather(city: str, transport: AsyncHttpTransport) -> str:
+    """
+    Get weather information for a specific city.
+
+    Parameters:
+        - city: The name of the city to get the weather information for (e.g., "New York")
+    """
+    params = {
+        "access_key": os.getenv('WHEATER_API_KEY'),
+        "query": city
+    }
+
+    return _format_weather(city, await transport.get_json(WEATHER_URL, params=params))
+
+@tool(name="tavily_search", cache_key=lambda args: _search_cache_key(**args), resilience=SEARCH_POLICY,
+      coalesce=SEARCH_FLIGHTS)
+async def async_tavily_search(
+        query: str, 
+        fetch_full_page: bool = True, 
+        max_results: int = 3,
+        transport: AsyncHttpTransport = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Use tools when user asks for information that is not in the knowledge base.
+    
+    Parameters:
+        - query (str): The search query to execute
+        - fetch_full_page (bool, optional): Whether to include raw content from sources.
+                                         Defaults to True.
+        - max_results (int, optional): Maximum number of results to return. Defaults to 3.
+    """
+    key = _search_cache_key(query, fetch_full_page, max_results)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await transport.post_json(TAVILY_SEARCH_URL, **_tavily_request(query, fetch_full_page, max_results))
+    output = _format_search(result, fetch_full_page, query)
+    if result:
+        search_cache.set(key, output)
+    return output
+
+
+def _iter_results(search_response: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Lazily flatten a search response, or a list of responses or results, into its results."""
+    if isinstance(search_response, dict):
+        return iter(search_response['results'])
+    if isinstance(search_response, list):
+        return chain.from_iterable(
+            response['results'] if isinstance(response, dict) and 'results' in response else response
+            for response in search_response
+        )
+    raise ValueError("Input must be either a dict with 'results' or a list of search results")
+
+
+def iter_formatted_sources(
+    search_response: Union[Dict[str, Any], List[Dict[str, Any]]],
+    max_tokens_per_source: int,
+    fetch_full_page: bool = False,
+    query: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Yield the deduplicated, formatted sources of search responses piece by piece.
+
+    Same output as ``deduplicate_and_format_sources`` (before its final strip), for
+    callers that write it straight into a prompt or file instead of building one
+    string. Sources are deduplicated by normalized URL as they stream, keeping the
+    first occurrence.
+
+    Raises:
+        ValueError: If input is neither a dict with 'results' key nor a list of search results
+    """
+    results = _iter_results(search_response)
+    yield "Sources:\n\n"
+    seen = set()
+    for source in results:
+        key = normalize_url(source['url'])
+        if key in seen:
+            continue
+        seen.add(key)
+        yield f"Source: {source['title']}\n===\n"
+        yield f"URL: {source['url']}\n===\n"
+        yield f"Most relevant content from source: {source['content']}\n===\n"
+        if fetch_full_page:
+            yield f"Full source content limited to {max_tokens_per_source} tokens: "
+            yield _limit_raw_content(source, max_tokens_per_source, query)
+            yield "\n\n"
+
+
+def _limit_raw_content(source: Dict[str, Any], max_tokens: int, query: Optional[str]) -> str:
+    """A source's full page content, compressed or truncated to ``max_tokens``."""
+    # Using rough estimate of 4 characters per token
+    char_limit = max_tokens * 4
+    raw_content = source.get('raw_content', '')
+    if raw_content is None:
+        print(f"Warning: No raw_content found for source {source['url']}")
+        return ''
+    if len(raw_content) <= char_limit:
+        return raw_content
+    if query:
+        # NumPy is only imported once a search result needs compressing
+        from src.compress import compress
+        return compress(raw_content, query, max_tokens)
+    return raw_content[:char_limit] + "... [truncated]"
 
 
 def deduplicate_and_format_sources(
     search_response: Union[Dict[str, Any], List[Dict[str, Any]]], 
     max_tokens_per_source: int, 
-    fetch_full_page: bool = False
+    fetch_full_page: bool = False,
+    query: Optional[str] = None
 ) -> str:
     """
     Format and deduplicate search responses from various search APIs.
     
     Takes either a single search response or list of responses from search APIs,
-    deduplicates them by URL, and formats them into a structured string.
+    deduplicates them by normalized URL (scheme, host case and tracking parameters
+    ignored), and formats them into a structured string.
     
     Args:
         search_response (Union[Dict[str, Any], List[Dict[str, Any]]]): Either:
@@ -130,6 +317,8 @@ def deduplicate_and_format_sources(
             - A list of dicts, each containing search results
         max_tokens_per_source (int): Maximum number of tokens to include for each source's content
         fetch_full_page (bool, optional): Whether to include the full page content. Defaults to False.
+        query (Optional[str], optional): Search query. When given, full page content over the
+            token limit keeps the passages most relevant to it instead of its prefix.
             
     Returns:
         str: Formatted string with deduplicated sources
@@ -137,44 +326,7 @@ def deduplicate_and_format_sources(
     Raises:
         ValueError: If input is neither a dict with 'results' key nor a list of search results
     """
-    # Convert input to list of results
-    if isinstance(search_response, dict):
-        sources_list = search_response['results']
-    elif isinstance(search_response, list):
-        sources_list = []
-        for response in search_response:
-            if isinstance(response, dict) and 'results' in response:
-                sources_list.extend(response['results'])
-            else:
-                sources_list.extend(response)
-    else:
-        raise ValueError("Input must be either a dict with 'results' or a list of search results")
-    
-    # Deduplicate by URL
-    unique_sources = {}
-    for source in sources_list:
-        if source['url'] not in unique_sources:
-            unique_sources[source['url']] = source
-    
-    # Format output
-    formatted_text = "Sources:\n\n"
-    for i, source in enumerate(unique_sources.values(), 1):
-        formatted_text += f"Source: {source['title']}\n===\n"
-        formatted_text += f"URL: {source['url']}\n===\n"
-        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
-        if fetch_full_page:
-            # Using rough estimate of 4 characters per token
-            char_limit = max_tokens_per_source * 4
-            # Handle None raw_content
-            raw_content = source.get('raw_content', '')
-            if raw_content is None:
-                raw_content = ''
-                print(f"Warning: No raw_content found for source {source['url']}")
-            if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-                
-    return formatted_text.strip()
+    return "".join(iter_formatted_sources(search_response, max_tokens_per_source, fetch_full_page, query)).strip()
 
 def format_sources(search_results: Dict[str, Any]) -> str:
     """
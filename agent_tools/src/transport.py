@@ -0,0 +1,219 @@
+import os
+import random
+import asyncio
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    # Only async tools need httpx; it is imported when the first async client is built
+    import httpx
+
+from src.resilience import DeadlineExceededError, remaining_budget
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry with exponential backoff for connection errors and retryable status codes."""
+    total: int = 3
+    backoff_factor: float = 0.3
+    status_forcelist: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    methods: Tuple[str, ...] = ("GET", "POST")
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based), with jitter."""
+        return self.backoff_factor * (2 ** (attempt - 1)) * (0.5 + random.random() / 2)
+
+    def to_urllib3(self) -> Retry:
+        return Retry(
+            total=self.total,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.status_forcelist,
+            allowed_methods=frozenset(self.methods),
+            raise_on_status=False,
+        )
+
+
+def bounded_timeouts(connect: float, read: float) -> Tuple[float, float]:
+    """Connect/read timeouts capped by the remaining deadline of the guarded call, if any."""
+    remaining = remaining_budget()
+    if remaining is None:
+        return connect, read
+    if remaining <= 0:
+        raise DeadlineExceededError("Deadline passed before the request was sent")
+    return min(connect, remaining), min(read, remaining)
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """
+    Connection pool and timeout settings shared by the sync and async transports.
+
+    Attributes:
+        max_hosts (int): Number of per-host connection pools kept alive
+        max_connections_per_host (int): Upper bound of concurrent connections to one host
+        connect_timeout (float): Seconds to establish a connection
+        read_timeout (float): Seconds to wait for response data
+        retry (RetryPolicy): Retry and backoff policy
+    """
+    max_hosts: int = 10
+    max_connections_per_host: int = 10
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    retry: RetryPolicy = RetryPolicy()
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        return cls(
+            max_connections_per_host=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 10)),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05)),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", 10.0)),
+            retry=RetryPolicy(total=int(os.getenv("HTTP_MAX_RETRIES", 3))),
+        )
+
+
+class HttpTransport:
+    """
+    Pooled keep-alive HTTP client for synchronous tools.
+
+    Wraps one ``requests.Session`` whose adapters keep a bounded pool of connections
+    per host (callers block when it is exhausted), apply the retry policy and always
+    send connect/read timeouts.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.config = config or TransportConfig()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.max_hosts,
+            pool_maxsize=self.config.max_connections_per_host,
+            pool_block=True,
+            max_retries=self.config.retry.to_urllib3(),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return bounded_timeouts(self.config.connect_timeout, self.config.read_timeout)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return self.request("GET", url, params=params, **kwargs).json()
+
+    def post_json(self, url: str, payload: Dict[str, Any], **kwargs: Any) -> Any:
+        return self.request("POST", url, json=payload, **kwargs).json()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHttpTransport:
+    """
+    Pooled keep-alive HTTP client for async tools, built on ``httpx.AsyncClient``.
+
+    httpx clients are bound to the event loop they were first used on, so one client
+    is kept per running loop. Clients are keyed by the loop object itself (not its id,
+    which a later loop may reuse) and dropped once their loop is closed, e.g. after
+    each ``asyncio.run``.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.config = config or TransportConfig()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _prune(self) -> None:
+        """Forget clients of closed loops; their connections cannot be used or closed cleanly anymore."""
+        for loop in [loop for loop in list(self._clients) if loop.is_closed()]:
+            self._clients.pop(loop, None)
+
+    def _client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            self._prune()
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.config.max_hosts * self.config.max_connections_per_host,
+                    max_keepalive_connections=self.config.max_connections_per_host,
+                ),
+                timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> "httpx.Response":
+        import httpx
+
+        retry = self.config.retry
+        attempt = 0
+        explicit_timeout = kwargs.pop("timeout", None)
+        while True:
+            try:
+                connect, read = bounded_timeouts(self.config.connect_timeout, self.config.read_timeout)
+                timeout = explicit_timeout or httpx.Timeout(read, connect=connect)
+                response = await self._client().request(method, url, timeout=timeout, **kwargs)
+                if response.status_code not in retry.status_forcelist or attempt >= retry.total:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError as e:
+                if attempt >= retry.total:
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying")
+            attempt += 1
+            await asyncio.sleep(retry.backoff(attempt))
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return (await self.request("GET", url, params=params, **kwargs)).json()
+
+    async def post_json(self, url: str, payload: Dict[str, Any], **kwargs: Any) -> Any:
+        return (await self.request("POST", url, json=payload, **kwargs)).json()
+
+    async def aclose(self) -> None:
+        """Close the running loop's client and forget those of closed loops."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        self._prune()
+
+
+_transport: Optional[HttpTransport] = None
+_async_transport: Optional[AsyncHttpTransport] = None
+_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport shared by all synchronous tools."""
+    global _transport
+    if _transport is None:
+        with _lock:
+            if _transport is None:
+                _transport = HttpTransport(TransportConfig.from_env())
+    return _transport
+
+
+def get_async_transport() -> AsyncHttpTransport:
+    """Return the process-wide transport shared by all async tools."""
+    global _async_transport
+    if _async_transport is None:
+        with _lock:
+            if _async_transport is None:
+                _async_transport = AsyncHttpTransport(TransportConfig.from_env())
+    return _async_transport
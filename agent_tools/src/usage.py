@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, Optional
+
+
+@dataclass
+class TokenUsage:
+    """Token counters accumulated over every LLM call of one query."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
+
+    def add(self, usage: Any) -> None:
+        """Add a ``usage`` object from a Groq/OpenAI completion response."""
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+        self.llm_calls += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+# Per thread / per asyncio task, so concurrent queries on one agent do not mix counts
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collect token usage of every LLM call made inside the block."""
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(usage: Any) -> None:
+    """Add a response's usage to the enclosing track_usage() block, if any."""
+    current = _current_usage.get()
+    if current is not None and usage is not None:
+        current.add(usage)
+
+
+def stream_usage(chunk: Any) -> Optional[Any]:
+    """Usage reported on a streamed chunk (Groq sends it on the last one under ``x_groq``)."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return usage
@@ -0,0 +1,179 @@
+import inspect
+from typing import Any, Callable, Dict, Iterable, Literal, Union, get_args, get_origin
+
+Coercer = Callable[[Any], Any]
+
+TRUE_STRINGS = {"true", "yes", "y", "1"}
+FALSE_STRINGS = {"false", "no", "n", "0"}
+
+
+class ToolArgumentError(ValueError):
+    """Raised when LLM-produced arguments do not match a tool's signature."""
+
+
+def _coerce_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError(f"expected str, got {type(value).__name__}")
+
+
+def _coerce_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError("expected int, got bool")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise TypeError(f"expected int, got {type(value).__name__}")
+
+
+def _coerce_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError("expected float, got bool")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return float(value.strip())
+    raise TypeError(f"expected float, got {type(value).__name__}")
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in TRUE_STRINGS:
+            return True
+        if text in FALSE_STRINGS:
+            return False
+    raise TypeError(f"expected bool, got {value!r}")
+
+
+SCALAR_COERCERS: Dict[Any, Coercer] = {
+    str: _coerce_str,
+    int: _coerce_int,
+    float: _coerce_float,
+    bool: _coerce_bool,
+}
+
+
+def _literal_coercer(choices: Iterable[Any]) -> Coercer:
+    choices = tuple(choices)
+    # LLMs often get the case of enum strings wrong
+    folded = {c.casefold(): c for c in choices if isinstance(c, str)}
+
+    def coerce(value: Any) -> Any:
+        if value in choices:
+            return value
+        if isinstance(value, str) and value.casefold() in folded:
+            return folded[value.casefold()]
+        raise TypeError(f"expected one of {choices}, got {value!r}")
+    return coerce
+
+
+def _union_coercer(options: Iterable[Coercer], allow_none: bool) -> Coercer:
+    options = tuple(options)
+
+    def coerce(value: Any) -> Any:
+        if value is None and allow_none:
+            return None
+        for option in options:
+            try:
+                return option(value)
+            except (TypeError, ValueError):
+                continue
+        raise TypeError(f"{value!r} does not match any allowed type")
+    return coerce
+
+
+def _isinstance_coercer(expected: type) -> Coercer:
+    def coerce(value: Any) -> Any:
+        if not isinstance(value, expected):
+            raise TypeError(f"expected {expected.__name__}, got {type(value).__name__}")
+        return value
+    return coerce
+
+
+def compile_coercer(type_hint: Any) -> Coercer:
+    """Build a coercion function for a type hint. Unsupported hints pass values through."""
+    if type_hint in SCALAR_COERCERS:
+        return SCALAR_COERCERS[type_hint]
+
+    origin = get_origin(type_hint)
+    if origin is Literal:
+        return _literal_coercer(get_args(type_hint))
+    if origin is Union:
+        args = get_args(type_hint)
+        return _union_coercer(
+            (compile_coercer(arg) for arg in args if arg is not type(None)),
+            allow_none=type(None) in args
+        )
+    if origin in (list, dict, tuple, set):
+        return _isinstance_coercer(origin)
+    if type_hint in (list, dict, tuple, set):
+        return _isinstance_coercer(type_hint)
+    return lambda value: value
+
+
+def compile_validator(
+    sig: inspect.Signature,
+    type_hints: Dict[str, Any],
+    skip: Iterable[str] = ()
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a validator for keyword arguments of a tool, once, at registration time.
+
+    The returned function rejects unknown and missing arguments, coerces values to
+    the annotated types (e.g. "100" -> 100.0 for a float) and fills in defaults.
+
+    Args:
+        sig (inspect.Signature): Signature of the tool function
+        type_hints (Dict[str, Any]): Resolved type hints of the tool function
+        skip (Iterable[str]): Parameters supplied by the registry, not by the LLM
+
+    Returns:
+        Callable[[Dict[str, Any]], Dict[str, Any]]: Validates and returns coerced arguments
+
+    Raises:
+        ToolArgumentError: From the returned function, when arguments are invalid
+    """
+    skip = set(skip)
+    specs = []
+    for name, param in sig.parameters.items():
+        if name in skip or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        specs.append((
+            name,
+            compile_coercer(type_hints.get(name, Any)),
+            param.default is param.empty,
+            param.default
+        ))
+    accepts_extra = any(p.kind is p.VAR_KEYWORD for p in sig.parameters.values())
+    known = frozenset(name for name, *_ in specs)
+
+    def validate(args: Dict[str, Any]) -> Dict[str, Any]:
+        if not accepts_extra:
+            unknown = args.keys() - known
+            if unknown:
+                raise ToolArgumentError(f"unexpected argument(s): {', '.join(sorted(unknown))}")
+
+        validated = dict(args) if accepts_extra else {}
+        for name, coerce, required, default in specs:
+            if name in args:
+                try:
+                    validated[name] = coerce(args[name])
+                except (TypeError, ValueError) as e:
+                    raise ToolArgumentError(f"invalid value for '{name}': {e}") from None
+            elif required:
+                raise ToolArgumentError(f"missing required argument '{name}'")
+            else:
+                validated[name] = default
+        return validated
+
+    return validate
@@ -0,0 +1,64 @@
+import json
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List
+import pytest
+
+
+class FakeCompletions:
+    """
+    Stand-in for a Groq/OpenAI chat client: answers planning prompts with ``plan`` and
+    summary prompts with the tool results it was given.
+    """
+
+    def __init__(self, plan: Dict[str, Any], usage_tokens: int = 120):
+        self.plan = plan
+        self.usage_tokens = usage_tokens
+        self.requests: List[List[Dict[str, str]]] = []
+        self.chat = self
+        self.completions = self
+
+    def text(self, messages: List[Dict[str, str]]) -> str:
+        self.requests.append(messages)
+        content = messages[-1]["content"]
+        if "Results:" in content:
+            return "Results: " + content.split("Results:")[1].strip()
+        return json.dumps(self.plan)
+
+    def response(self, text: str) -> Any:
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=self.usage_tokens)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+    def chunks(self, text: str) -> List[Any]:
+        # Small chunks, so streamed plans are parsed incrementally
+        return [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 7]))], usage=None)
+            for i in range(0, len(text), 7)
+        ]
+
+    def create(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        text = self.text(messages)
+        return iter(self.chunks(text)) if stream else self.response(text)
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    async def create(self, messages: List[Dict[str, str]], stream: bool = False, **params: Any) -> Any:
+        await asyncio.sleep(0)
+        text = self.text(messages)
+        if not stream:
+            return self.response(text)
+
+        async def chunks():
+            for chunk in self.chunks(text):
+                yield chunk
+        return chunks()
+
+
+@pytest.fixture
+def fake_llm():
+    """Attach a fake chat client answering with ``plan`` to an agent's first LLM backend."""
+    def attach(agent, plan: Dict[str, Any]) -> FakeCompletions:
+        client = AsyncFakeCompletions(plan) if agent.asynchronous else FakeCompletions(plan)
+        agent.llm.backends[0].set_client(client, asynchronous=agent.asynchronous)
+        return client
+    return attach
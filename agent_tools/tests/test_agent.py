@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from main import Agent, AsyncAgent
+from src.tool_registry import tool
+
+
+@tool()
+def echo(value: int) -> str:
+    """
+    Echo a value.
+
+    Parameters:
+        - value: Value to echo
+    """
+    return f"A:{value}"
+
+
+@tool()
+def unrelated_lookup(city: str) -> str:
+    """
+    Look up something unrelated.
+
+    Parameters:
+        - city: City name
+    """
+    return f"B:{city}"
+
+
+PLAN_WITH_UNKNOWN_TOOL = {
+    "requires_tools": True,
+    "thought": "t",
+    "plan": ["p"],
+    "tool_calls": [
+        {"tool": "echo", "args": {"value": 1}},
+        {"tool": "ghost", "args": {}},
+        {"tool": "echo", "args": {"value": 3}},
+    ],
+}
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_unknown_tool_does_not_drop_later_calls(fake_llm, speculative):
+    agent = Agent(speculative=speculative, tool_top_k=1)
+    agent.add_tool(echo)
+    agent.add_tool(unrelated_lookup)
+    llm = fake_llm(agent, PLAN_WITH_UNKNOWN_TOOL)
+
+    answer = agent.execute_plan("echo the value")
+
+    assert answer == "Results: A:1. Error: Tool ghost not found.. A:3"
+    # Hallucinated tools never trigger a re-plan: one planning and one summary request
+    assert len(llm.requests) == 2
+
+
+def echo_plan(*values):
+    return {
+        "requires_tools": True,
+        "thought": "t",
+        "plan": ["p"],
+        "tool_calls": [{"tool": "echo", "args": {"value": value}} for value in values],
+    }
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_async_agent_runs_the_plan_and_summarizes(fake_llm, speculative):
+    agent = AsyncAgent(speculative=speculative)
+    agent.add_tool(echo)
+    llm = fake_llm(agent, echo_plan(1, 2))
+
+    assert asyncio.run(agent.execute_plan("echo two values")) == "Results: A:1. A:2"
+    assert len(llm.requests) == 2
+
+
+def test_async_agent_reports_invalid_arguments(fake_llm):
+    agent = AsyncAgent()
+    agent.add_tool(echo)
+    fake_llm(agent, echo_plan("one", 2))
+
+    answer = asyncio.run(agent.execute_plan("echo"))
+    assert answer.startswith("Results: Error: Invalid arguments for echo: invalid value for 'value'")
+    assert answer.endswith("A:2")
+
+
+def test_async_agent_streams_tool_results_and_tokens(fake_llm):
+    agent = AsyncAgent()
+    agent.add_tool(echo)
+    fake_llm(agent, echo_plan(1))
+
+    async def collect():
+        return [event async for event in agent.execute_plan_stream("echo")]
+
+    events = asyncio.run(collect())
+    assert [event["type"] for event in events][:2] == ["plan", "tool_result"]
+    assert events[1]["output"] == "A:1"
+    assert events[-1] == {"type": "done", "content": "Results: A:1"}
+    assert "".join(event["content"] for event in events if event["type"] == "token") == "Results: A:1"
+
+
+def test_async_agent_execute_many_keeps_input_order(fake_llm):
+    agent = AsyncAgent()
+    agent.add_tool(echo)
+    fake_llm(agent, echo_plan(7))
+
+    answers = asyncio.run(agent.execute_many(["a", "b", "c"], concurrency=2))
+    assert answers == ["Results: A:7"] * 3
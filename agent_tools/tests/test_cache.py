@@ -0,0 +1,79 @@
+import time
+import threading
+import pytest
+from src.cache import SqliteStore, TTLCache
+from src.coalesce import SingleFlight
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_rejects_oversized_values():
+    cache = TTLCache(max_bytes=20)
+    cache.set("small", "x")
+    cache.set("huge", "x" * 100)
+    assert cache.get("small") == "x"
+    assert cache.get("huge") is None
+
+
+def test_store_serves_memory_misses(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TTLCache(ttl=60, store=SqliteStore(path)).set("key", {"value": 1})
+    assert TTLCache(ttl=60, store=SqliteStore(path)).get("key") == {"value": 1}
+
+
+def test_concurrent_callers_share_one_flight():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        entered.set()
+        release.wait(1)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+    leader.start()
+    entered.wait(1)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(1)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.in_flight == 0
+
+
+def test_flight_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: "retried") == "retried"
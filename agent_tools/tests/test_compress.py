@@ -0,0 +1,35 @@
+from src.compress import GAP, compress, count_tokens, split_passages
+
+FILLER = "The weather in the region is usually mild and pleasant. "
+
+
+def test_text_within_budget_is_unchanged():
+    assert compress("Short text.", "anything", max_tokens=100) == "Short text."
+
+
+def test_keeps_relevant_passages_within_budget():
+    text = FILLER * 20 + "Tokyo ramen shops open late near Shinjuku station. " + FILLER * 20
+    result = compress(text, "ramen in Tokyo", max_tokens=40)
+    assert "Tokyo ramen shops" in result
+    assert result.startswith(GAP) and result.endswith(GAP)
+    assert count_tokens(result) <= 40
+
+
+def test_without_query_terms_keeps_leading_passages():
+    text = "First sentence here. " + FILLER * 30
+    result = compress(text, "zzz", max_tokens=20)
+    assert result.startswith("First sentence here.")
+    assert count_tokens(result) <= 20
+
+
+def test_long_run_on_text_is_split_at_words():
+    passages = split_passages("word " * 500, max_chars=100)
+    assert all(len(passage) <= 100 for passage in passages)
+    assert sum(len(passage.split()) for passage in passages) == 500
+
+
+def test_input_is_truncated_before_compressing():
+    text = FILLER * 10 + "needle appears only far away. "
+    result = compress(text, "needle", max_tokens=30, max_input_chars=len(FILLER) * 10)
+    assert "needle" not in result
+    assert result.endswith(GAP)
@@ -0,0 +1,53 @@
+import time
+import pytest
+from src.exchange_rates import ExchangeRateCache
+
+
+class FlakyUpstream:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, base):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {"EUR": 0.5, "IDR": 16000.0}
+
+
+def test_failed_refresh_serves_stale_table_without_refetching():
+    upstream = FlakyUpstream()
+    cache = ExchangeRateCache(ttl=0.01, fetch=upstream, retry_backoff=60)
+    assert cache.rate("USD", "EUR") == 0.5
+
+    upstream.fail = True
+    time.sleep(0.02)
+    for _ in range(5):
+        assert cache.rate("EUR", "IDR") == 32000.0
+    # One failed refresh, then the stale table until the backoff elapses
+    assert upstream.calls == 2
+    assert cache.stats()["errors"] == 1
+
+
+def test_refresh_retried_after_backoff():
+    upstream = FlakyUpstream()
+    cache = ExchangeRateCache(ttl=0.01, fetch=upstream, retry_backoff=0.05)
+    cache.rates()
+    upstream.fail = True
+    time.sleep(0.02)
+    cache.rates()
+    upstream.fail = False
+    time.sleep(0.06)
+    cache.rates()
+    assert upstream.calls == 3
+    assert not cache.expired
+
+
+def test_failing_upstream_without_table_raises_during_backoff():
+    upstream = FlakyUpstream()
+    upstream.fail = True
+    cache = ExchangeRateCache(fetch=upstream, retry_backoff=60)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            cache.rates()
+    assert upstream.calls == 1
@@ -0,0 +1,20 @@
+from src.plan_cache import PlanCache
+
+
+def test_key_keeps_amounts_and_operators():
+    fingerprint = "registry"
+    assert PlanCache.key("Convert 1,500 USD to EUR", fingerprint) != PlanCache.key("Convert 1.500 USD to EUR", fingerprint)
+    assert PlanCache.key("What is 2+2", fingerprint) != PlanCache.key("What is 2-2", fingerprint)
+
+
+def test_key_ignores_case_and_whitespace():
+    fingerprint = "registry"
+    assert PlanCache.key("Convert 1,500  USD to EUR", fingerprint) == PlanCache.key(" convert 1,500 usd TO eur", fingerprint)
+
+
+def test_cached_plan_is_not_served_for_other_amount(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite"))
+    plan = {"requires_tools": False, "direct_response": "4"}
+    cache.set("What is 2+2", "registry", plan)
+    assert cache.get("What is 2+2", "registry") == plan
+    assert cache.get("What is 2-2", "registry") is None
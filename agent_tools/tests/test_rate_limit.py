@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from src.rate_limit import RateLimiter, TokenBucket
+
+
+def test_bucket_delay_grows_with_the_deficit():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60, now=bucket.updated) == (0.0, 60)
+    delay, _ = bucket.reserve(1, now=bucket.updated)
+    assert delay == pytest.approx(1.0)
+    delay, _ = bucket.reserve(1, now=bucket.updated)
+    assert delay == pytest.approx(2.0)
+
+
+def test_oversized_request_is_capped_at_capacity():
+    bucket = TokenBucket(per_minute=100)
+    delay, debited = bucket.reserve(1000, now=bucket.updated)
+    assert (delay, debited) == (0.0, 100)
+
+
+def test_reconcile_refunds_overestimated_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000, headroom=1.0, completion_tokens=0)
+    reserved = limiter.acquire(400)
+    assert reserved == 400
+    limiter.reconcile(reserved, 100)
+    assert limiter.tokens.level == pytest.approx(900, abs=1)
+
+
+def test_try_acquire_never_waits():
+    limiter = RateLimiter(requests_per_minute=2, headroom=1.0)
+    assert limiter.try_acquire(0) == 0
+    assert limiter.try_acquire(0) == 0
+    assert limiter.try_acquire(0) is None
+    assert limiter.stats()["waits"] == 0
+
+
+def test_cancelled_async_waiter_releases_its_reservation():
+    limiter = RateLimiter(requests_per_minute=60, headroom=1.0)
+    for _ in range(60):
+        limiter.acquire(0)
+
+    async def main():
+        waiter = asyncio.ensure_future(limiter.acquire_async(0))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
+    # Only the refill since, not the cancelled request, is missing from the deficit
+    assert limiter.requests.level == pytest.approx(0, abs=0.1)
@@ -0,0 +1,105 @@
+import time
+import threading
+import pytest
+from src.metrics import LatencyHistogram
+from src.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    Resilience,
+    ResiliencePolicy,
+    WorkersBusyError,
+    remaining_budget,
+)
+
+
+def guard(name="tool", **policy):
+    return Resilience(name, ResiliencePolicy(**policy), LatencyHistogram())
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failures_open_the_circuit():
+    resilience = guard(failure_threshold=2)
+
+    def broken():
+        raise ConnectionError("down")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            resilience.call(broken)
+    with pytest.raises(CircuitOpenError):
+        resilience.call(lambda: "ok")
+
+
+def test_deadline_is_exposed_to_the_call():
+    resilience = guard(timeout=1.0)
+    remaining = resilience.call(remaining_budget)
+    assert 0.9 < remaining <= 1.0
+    assert remaining_budget() is None
+
+
+def test_stuck_upstream_does_not_starve_other_tools():
+    release = threading.Event()
+    stuck = guard("stuck", timeout=0.1, max_workers=2, failure_threshold=100)
+    healthy = guard("healthy", timeout=0.5)
+    for _ in range(2):
+        with pytest.raises(DeadlineExceededError):
+            stuck.call(release.wait)
+    try:
+        assert healthy.call(lambda: "ok") == "ok"
+    finally:
+        release.set()
+
+
+def test_waiting_for_a_worker_is_not_an_upstream_failure():
+    release = threading.Event()
+    resilience = guard(timeout=0.1, max_workers=1)
+    with pytest.raises(DeadlineExceededError):
+        resilience.call(release.wait)
+    failures = resilience.breaker.failures
+    try:
+        # The only worker is still held by the abandoned call
+        with pytest.raises(WorkersBusyError):
+            resilience.call(lambda: "ok")
+        assert resilience.breaker.failures == failures
+        assert resilience.rejected == 1
+    finally:
+        release.set()
+
+
+def test_cancelled_async_trial_lets_the_breaker_probe_again():
+    import asyncio
+
+    resilience = guard(failure_threshold=1, reset_timeout=0.01)
+
+    async def broken():
+        raise ConnectionError("down")
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await resilience.call_async(broken)
+        await asyncio.sleep(0.02)
+        trial = asyncio.ensure_future(resilience.call_async(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        async def ok():
+            return "ok"
+        # The abandoned trial is released, so the next call probes and closes the circuit
+        assert await resilience.call_async(ok) == "ok"
+        assert resilience.breaker.state == "closed"
+
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+import time
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.llm_backend import Backend, LLMRouter
+from src.rate_limit import RateLimiter
+from src.resilience import CircuitOpenError
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class SlowChat:
+    """Chat client answering with its own name after ``delay`` seconds, or failing."""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def _answer(self) -> SimpleNamespace:
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return SimpleNamespace(content=self.name)
+
+    def create(self, **request) -> SimpleNamespace:
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._answer()
+
+
+class AsyncSlowChat(SlowChat):
+    async def create(self, **request) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self._answer()
+
+
+def make_router(clients, limiter=None, asynchronous=False, history=True):
+    backends = []
+    for client in clients:
+        backend = Backend(client.name, "model")
+        backend.set_client(client, asynchronous=asynchronous)
+        backends.append(backend)
+    # Only the primary has latency history, so it goes first and sets the hedge delay
+    for _ in range(3 if history else 0):
+        backends[0].latency.observe(0.05)
+    return LLMRouter(backends, hedge_min_samples=3, rate_limiter=limiter)
+
+
+def test_fails_over_to_the_next_backend():
+    primary, backup = SlowChat("primary", fail=True), SlowChat("backup")
+    router = make_router([primary, backup], history=False)  # not hedged: runs on this thread
+    assert router.create(MESSAGES).content == "backup"
+    assert router.failovers == 1
+
+
+def test_hedges_a_slow_primary():
+    primary, backup = SlowChat("primary", delay=0.5), SlowChat("backup")
+    router = make_router([primary, backup])
+    assert router.create(MESSAGES).content == "backup"
+    assert router.hedges == 1
+
+
+def test_hedge_is_skipped_without_rate_limit_headroom():
+    limiter = RateLimiter(requests_per_minute=1, headroom=1.0)
+    limiter.acquire(0)  # the caller's own reservation uses up the budget
+    primary, backup = SlowChat("primary", delay=0.2), SlowChat("backup")
+    router = make_router([primary, backup], limiter)
+    assert router.create(MESSAGES).content == "primary"
+    assert (router.hedges, router.hedges_skipped, backup.calls) == (0, 1, 0)
+
+
+def test_hedge_takes_its_own_reservation():
+    limiter = RateLimiter(requests_per_minute=60, headroom=1.0)
+    router = make_router([SlowChat("primary", delay=0.3), SlowChat("backup")], limiter)
+    router.create(MESSAGES)
+    assert router.hedges == 1
+    assert limiter.requests.level == pytest.approx(59, abs=0.5)
+
+
+def test_no_hedge_while_a_failover_is_pending():
+    primary, backup, third = SlowChat("primary", fail=True), SlowChat("backup", delay=0.2), SlowChat("third")
+    limiter = RateLimiter(requests_per_minute=60, headroom=1.0)
+    router = make_router([primary, backup, third], limiter)
+    assert router.create(MESSAGES).content == "backup"
+    assert (router.failovers, router.hedges, third.calls) == (1, 0, 0)
+    # The failover reserved a request of its own
+    assert limiter.requests.level == pytest.approx(59, abs=0.5)
+
+
+def test_async_failover_does_not_hedge_and_hedge_respects_limiter():
+    async def main():
+        clients = [AsyncSlowChat("primary", fail=True), AsyncSlowChat("backup", delay=0.2), AsyncSlowChat("third")]
+        router = make_router(clients, asynchronous=True)
+        assert (await router.acreate(MESSAGES)).content == "backup"
+        assert (router.failovers, router.hedges, clients[2].calls) == (1, 0, 0)
+
+        limiter = RateLimiter(requests_per_minute=1, headroom=1.0)
+        limiter.acquire(0)
+        router = make_router([AsyncSlowChat("primary", delay=0.2), AsyncSlowChat("backup")], limiter, asynchronous=True)
+        assert (await router.acreate(MESSAGES)).content == "primary"
+        assert router.hedges_skipped == 1
+
+    asyncio.run(main())
+
+
+def test_open_circuits_fail_fast():
+    router = make_router([SlowChat("primary"), SlowChat("backup")])
+    for backend in router.backends:
+        for _ in range(backend.breaker.failure_threshold):
+            backend.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        router.create(MESSAGES)
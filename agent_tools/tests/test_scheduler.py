@@ -0,0 +1,45 @@
+import time
+from src.scheduler import ToolScheduler
+
+
+def sleepy(tool_name, seconds):
+    time.sleep(seconds)
+    return tool_name
+
+
+def test_timed_out_call_is_yielded_at_its_own_deadline():
+    scheduler = ToolScheduler(sleepy, max_workers=2)
+    try:
+        schedule = scheduler.start()
+        schedule.add({"tool": "slow", "args": {"seconds": 0.6}, "timeout": 0.1})
+        schedule.add({"tool": "sibling", "args": {"seconds": 0.4}, "timeout": 1.0})
+        start = time.monotonic()
+        index, output = next(schedule.iter_completed())
+        elapsed = time.monotonic() - start
+        assert (index, output) == (0, "Error: Tool slow timed out")
+        # Not held back until the sibling finishes or reaches its deadline
+        assert elapsed < 0.3
+        assert schedule.results() == ["Error: Tool slow timed out", "sibling"]
+    finally:
+        scheduler.shutdown()
+
+
+def test_call_started_late_expires_at_its_own_deadline():
+    scheduler = ToolScheduler(sleepy, max_workers=2, pool_size=2)
+    try:
+        schedule = scheduler.start()
+        schedule.add({"tool": "long", "args": {"seconds": 0.8}, "timeout": 5.0})
+        # Expires at 0.05s but holds its pool thread until 0.2s, so the next call starts late
+        schedule.add({"tool": "stuck", "args": {"seconds": 0.2}, "timeout": 0.05})
+        schedule.add({"tool": "late", "args": {"seconds": 2.0}, "timeout": 0.1})
+        start = time.monotonic()
+        completed = {}
+        for index, output in schedule.iter_completed():
+            completed[index] = (output, time.monotonic() - start)
+            if index == 2:
+                break
+        assert completed[2][0] == "Error: Tool late timed out"
+        # Started around 0.2s, so due around 0.3s; not when the long call ends
+        assert completed[2][1] < 0.6
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,48 @@
+import pytest
+from src.tools import _search_cache_key, get_weather, search_cache, tavily_search
+
+WEATHER = {
+    "location": {"name": "Paris", "country": "France"},
+    "current": {"weather_descriptions": ["Sunny"], "temperature": 21},
+}
+
+
+class FakeTransport:
+    """Returns the queued responses in order and counts requests."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def get_json(self, url, **kwargs):
+        self.requests += 1
+        return self.responses.pop(0)
+
+    post_json = get_json
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    get_weather.cache.clear()
+    search_cache.clear()
+
+
+def test_search_cache_key_keeps_symbols():
+    keys = {_search_cache_key(query, True, 3) for query in ("C++", "C#", "C")}
+    assert len(keys) == 3
+    assert _search_cache_key("  c++  tutorial", True, 3) == _search_cache_key("C++ Tutorial", True, 3)
+
+
+def test_weather_without_data_is_not_cached():
+    transport = FakeTransport({"success": False}, WEATHER)
+    assert get_weather(city="Paris", transport=transport).startswith("Sorry")
+    assert "Sunny" in get_weather(city="Paris", transport=transport)
+    assert "Sunny" in get_weather(city="Paris", transport=transport)
+    assert transport.requests == 2
+
+
+def test_empty_search_is_not_cached():
+    transport = FakeTransport({}, {})
+    for _ in range(2):
+        assert tavily_search(query="C++", transport=transport).startswith("Sorry")
+    assert transport.requests == 2
@@ -0,0 +1,32 @@
+import inspect
+from typing import Literal, Optional, get_type_hints
+import pytest
+from src.validation import ToolArgumentError, compile_validator
+
+
+def convert(amount: float, currency: Literal["USD", "EUR"], rounded: bool = False,
+            note: Optional[int] = None, transport: object = None) -> str:
+    return ""
+
+
+validate = compile_validator(inspect.signature(convert), get_type_hints(convert), skip=("transport",))
+
+
+def test_coerces_llm_values_and_fills_defaults():
+    assert validate({"amount": "100", "currency": "usd", "rounded": "yes"}) == {
+        "amount": 100.0, "currency": "USD", "rounded": True, "note": None
+    }
+    assert validate({"amount": 5, "currency": "EUR", "note": 3.0})["note"] == 3
+
+
+@pytest.mark.parametrize("args, message", [
+    ({"currency": "USD"}, "missing required argument 'amount'"),
+    ({"amount": 1, "currency": "USD", "transport": None}, "unexpected argument(s): transport"),
+    ({"amount": "lots", "currency": "USD"}, "invalid value for 'amount'"),
+    ({"amount": 1, "currency": "GBP"}, "invalid value for 'currency'"),
+    ({"amount": True, "currency": "USD"}, "invalid value for 'amount'"),
+    ({"amount": 1, "currency": "USD", "rounded": "maybe"}, "invalid value for 'rounded'"),
+])
+def test_rejects_invalid_arguments(args, message):
+    with pytest.raises(ToolArgumentError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        validate(args)
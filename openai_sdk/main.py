@@ -1,5 +1,6 @@
-from agents import Runner
+from agents import InputGuardrailTripwireTriggered
 from src.agent.triagent import triage_agent
+from src.guardrails.optimistic import run_optimistic
 # from openai.types.responses import ResponseTextDeltaEvent
 
 
@@ -10,11 +11,14 @@ async def main():
     #     if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
     #         print(event.data.delta, end="", flush=True)
     
-    result = await Runner.run(triage_agent, "Siapa presiden ke 3 indonesia?")
-    print(result.final_output)
-    print("="*30)
-    result = await Runner.run(triage_agent, "Beri saya Joke gelap!")
-    print(result.final_output)
+    # The guardrail runs alongside triage and handoff; output is only returned once it passes
+    for question in ["Siapa presiden ke 3 indonesia?", "Beri saya Joke gelap!"]:
+        try:
+            result = await run_optimistic(triage_agent, question)
+            print(result.final_output)
+        except InputGuardrailTripwireTriggered as e:
+            print(f"Guardrail tripped: {e.guardrail_result.output.output_info.reasoning}")
+        print("="*30)
 
 if __name__ == "__main__":
     import asyncio
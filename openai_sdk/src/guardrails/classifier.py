@@ -0,0 +1,228 @@
+import re
+import json
+import argparse
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# One arithmetic expression such as "12 * 7", "2 x 3", "x^2" or "3x + 5 = 20": operands
+# (numbers, variables, "3x") joined by operators. Used as a feature on its own, since
+# "1945 - 1949" or "2 x 3 rooms" match it as well; see is_math_expression.
+MATH_OPERAND = r"\(*-?(?:\d+(?:[.,]\d+)*[a-z]?|[a-z])\)*"
+# "x" only multiplies between spaced or bare numbers ("2 x 3", "2x3"), never inside a word
+MATH_OPERATOR = r"\s*[-+*/×÷^=]\s*|\s+x\s+|(?<=\d)x(?=\d)"
+MATH_EXPRESSION = re.compile(rf"(?<!\w){MATH_OPERAND}(?:(?:{MATH_OPERATOR}){MATH_OPERAND})+(?!\w)")
+MATH_TOKEN = re.compile(r"\d+(?:[.,]\d+)*[a-z]?|[a-z]|[-+*/×÷^=]")
+MATH_FEATURE = "<math>"
+
+
+def normalize_input(text: str) -> str:
+    """Casefold, strip accents and collapse whitespace, so trivially different inputs compare equal."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Word unigrams and bigrams of normalized text, plus MATH_FEATURE when it contains arithmetic."""
+    words = WORD_PATTERN.findall(normalize_input(text))
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if contains_math(text):
+        tokens.append(MATH_FEATURE)
+    return tokens
+
+
+def contains_math(text: str) -> bool:
+    """Whether an arithmetic expression appears anywhere in ``text``; a hint, not a verdict."""
+    return MATH_EXPRESSION.search(normalize_input(text)) is not None
+
+
+def is_math_expression(text: str, max_word_ratio: float = 0.2, max_words: int = 2) -> bool:
+    """
+    Whether the whole input is essentially an arithmetic expression.
+
+    Apart from the expressions, only words may remain (no stray digits, as in "10:30 - 11:45"),
+    at most ``max_words`` of them and at most ``max_word_ratio`` of all tokens, so padding a
+    request with arithmetic does not help. "12 * 7" or "3x + 5 = 20" qualify; "Years 1945 - 1949"
+    or an off-topic request with "2+2" appended do not.
+    """
+    text = normalize_input(text)
+    matches = list(MATH_EXPRESSION.finditer(text))
+    if not matches:
+        return False
+    rest = MATH_EXPRESSION.sub(" ", text)
+    if any(ch.isdigit() for ch in rest):
+        return False
+    math_tokens = sum(len(MATH_TOKEN.findall(match.group())) for match in matches)
+    words = len(WORD_PATTERN.findall(rest))
+    return words <= max_words and words / (words + math_tokens) <= max_word_ratio
+
+
+class HomeworkClassifier:
+    """
+    TF-IDF + logistic regression deciding whether an input is a homework question.
+
+    Trained offline from verdicts the LLM guardrail logged, so it learns the guardrail's
+    own decisions. Scoring one input is a sparse dot product, microseconds instead of
+    an LLM round-trip; ``verdict`` only answers when the probability is confidently
+    high or low and leaves the rest to the LLM.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, weights: np.ndarray, bias: float):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    def _features(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    matrix[row, column] += 1
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    @classmethod
+    def fit(
+        cls,
+        texts: List[str],
+        labels: List[bool],
+        epochs: int = 500,
+        learning_rate: float = 1.0,
+        l2: float = 1e-3,
+        min_df: int = 1
+    ) -> "HomeworkClassifier":
+        """
+        Train on labelled inputs with full-batch gradient descent.
+
+        Args:
+            texts (List[str]): User inputs
+            labels (List[bool]): Whether each input is homework
+            epochs (int): Gradient descent steps
+            learning_rate (float): Step size
+            l2 (float): L2 regularization strength
+            min_df (int): Minimum number of inputs a token must appear in to be a feature
+        """
+        if len(set(labels)) < 2:
+            raise ValueError("Training needs both homework and non-homework verdicts")
+        document_frequency: Dict[str, int] = {}
+        for text in texts:
+            for token in set(tokenize(text)):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        tokens = sorted(token for token, count in document_frequency.items() if count >= min_df)
+        vocabulary = {token: column for column, token in enumerate(tokens)}
+        df = np.array([document_frequency[token] for token in tokens], dtype=np.float64)
+        idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+        model = cls(vocabulary, idf, np.zeros(len(tokens)), 0.0)
+        x = model._features(texts)
+        y = np.array(labels, dtype=np.float64)
+        for _ in range(epochs):
+            error = 1 / (1 + np.exp(-(x @ model.weights + model.bias))) - y
+            model.weights -= learning_rate * (x.T @ error / len(y) + l2 * model.weights)
+            model.bias -= learning_rate * error.mean()
+        return model
+
+    def _score(self, text: str) -> Tuple[float, int]:
+        """Homework probability of ``text`` and the number of distinct vocabulary features it contains."""
+        # Same as _features for one input, but only touching the columns it uses
+        counts: Dict[int, int] = {}
+        for token in tokenize(text):
+            column = self.vocabulary.get(token)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        score = self.bias
+        if counts:
+            columns = np.fromiter(counts, dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[columns]
+            score += float(values @ self.weights[columns]) / float(np.linalg.norm(values))
+        return float(1 / (1 + np.exp(-score))), len(counts)
+
+    def predict_proba(self, text: str) -> float:
+        """Probability that ``text`` is a homework question."""
+        return self._score(text)[0]
+
+    def verdict(self, text: str, confidence: float = 0.9, min_features: int = 2) -> Tuple[Optional[bool], float]:
+        """
+        Confident decision for ``text``, or None when the LLM should decide.
+
+        An input sharing fewer than ``min_features`` features with the training data is
+        always left to the LLM: its probability would mostly be the bias, i.e. the share
+        of homework in the log, not anything about the input.
+
+        Returns:
+            Tuple[Optional[bool], float]: Whether it is homework (None if ambiguous) and the probability
+        """
+        probability, matched = self._score(text)
+        if matched < min_features:
+            return None, probability
+        if probability >= confidence:
+            return True, probability
+        if probability <= 1 - confidence:
+            return False, probability
+        return None, probability
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "vocabulary": self.vocabulary,
+                "idf": self.idf.tolist(),
+                "weights": self.weights.tolist(),
+                "bias": self.bias,
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HomeworkClassifier":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["vocabulary"], np.array(data["idf"]), np.array(data["weights"]), data["bias"])
+
+
+def load_verdicts(path: str) -> Tuple[List[str], List[bool]]:
+    """Inputs and labels from a verdict log (JSON lines with ``input`` and ``is_homework``)."""
+    latest: Dict[str, Tuple[str, bool]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            # The same input may be logged more than once; its latest verdict wins
+            latest[normalize_input(record["input"])] = (record["input"], bool(record["is_homework"]))
+    texts = [text for text, _ in latest.values()]
+    labels = [label for _, label in latest.values()]
+    return texts, labels
+
+
+def main():
+    from src.utils.constant import GUARDRAIL_LOG_PATH, GUARDRAIL_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Train the local homework classifier from logged LLM verdicts.")
+    parser.add_argument("--log", default=GUARDRAIL_LOG_PATH, help="Verdict log written by homework_guardrail")
+    parser.add_argument("--out", default=GUARDRAIL_MODEL_PATH, help="Where to save the trained model")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of verdicts kept for evaluation")
+    args = parser.parse_args()
+
+    texts, labels = load_verdicts(args.log)
+    split = int(len(texts) * (1 - args.holdout))
+    order = np.random.default_rng(0).permutation(len(texts))
+    train = [int(i) for i in order[:split]]
+    test = [int(i) for i in order[split:]]
+    model = HomeworkClassifier.fit([texts[i] for i in train], [labels[i] for i in train])
+    if test:
+        decided = [(model.verdict(texts[i])[0], labels[i]) for i in test]
+        confident = [(guess, label) for guess, label in decided if guess is not None]
+        accuracy = sum(guess == label for guess, label in confident) / len(confident) if confident else 0.0
+        print(f"Held-out: {len(confident)}/{len(test)} decided locally, {accuracy:.1%} agree with the LLM")
+    # The saved model is trained on every verdict
+    HomeworkClassifier.fit(texts, labels).save(args.out)
+    print(f"Trained on {len(texts)} verdicts, saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
+import os
+import json
+import time
+import logging
+from collections import Counter
+from typing import Any, Optional
 from agents import Agent, Runner, GuardrailFunctionOutput
 from src.utils.models import HomeworkOutput
 from src.llm.llm_model import create_litellm_model
-from src.utils.constant import GROQ_API_KEY, GROQ_BASE_URL
+from src.utils.constant import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GUARDRAIL_LOG_PATH,
+    GUARDRAIL_MODEL_PATH,
+    GUARDRAIL_CONFIDENCE,
+    GUARDRAIL_MIN_FEATURES,
+    GUARDRAIL_CACHE_SIZE,
+    GUARDRAIL_CACHE_TTL,
+)
+from src.guardrails.classifier import HomeworkClassifier, contains_math, is_math_expression, normalize_input
+from src.guardrails.verdict_cache import VerdictCache
+
+logger = logging.getLogger(__name__)
 
 model = create_litellm_model(base_url=GROQ_BASE_URL, api_key=GROQ_API_KEY, model_name="meta-llama/llama-4-scout-17b-16e-instruct")
 
@@ -12,11 +31,94 @@ guardrail_agent = Agent(
     model=model,
 )
 
+# Arithmetic inside a longer input is only a hint; the rest of the request still decides
+math_guardrail_agent = guardrail_agent.clone(
+    instructions=guardrail_agent.instructions + " The input contains a math expression, which alone "
+    "does not make it homework: judge the whole request.",
+)
+
+verdict_cache: VerdictCache[HomeworkOutput] = VerdictCache(max_entries=GUARDRAIL_CACHE_SIZE, ttl=GUARDRAIL_CACHE_TTL)
+
+# Which tier decided each check: cache, rule, classifier or llm
+guardrail_stats: Counter = Counter()
+
+
+def load_classifier(path: str = GUARDRAIL_MODEL_PATH) -> Optional[HomeworkClassifier]:
+    """The trained local classifier, or None until one has been trained."""
+    if not os.path.exists(path):
+        logger.info(f"No homework classifier at {path}, ambiguous inputs go to the LLM guardrail")
+        return None
+    return HomeworkClassifier.load(path)
+
+
+classifier = load_classifier()
+
+
+def input_text(input_data: Any) -> str:
+    """The user text of a guardrail input: a string or a list of response input items."""
+    if isinstance(input_data, str):
+        return input_data
+    parts = []
+    for item in input_data:
+        if not isinstance(item, dict) or item.get("role", "user") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+    return "\n".join(parts)
+
+
+def local_verdict(text: str) -> Optional[HomeworkOutput]:
+    """Decide clear-cut inputs without the LLM, or return None for ambiguous ones."""
+    if is_math_expression(text):
+        guardrail_stats["rule"] += 1
+        return HomeworkOutput(is_homework=True, reasoning="The input is a math expression.")
+    if classifier is None:
+        return None
+    is_homework, probability = classifier.verdict(text, GUARDRAIL_CONFIDENCE, GUARDRAIL_MIN_FEATURES)
+    if is_homework is None:
+        return None
+    guardrail_stats["classifier"] += 1
+    return HomeworkOutput(
+        is_homework=is_homework,
+        reasoning=f"Local classifier, homework probability {probability:.2f}.",
+    )
+
+
+def log_verdict(text: str, verdict: HomeworkOutput, path: str = GUARDRAIL_LOG_PATH) -> None:
+    """Append an LLM verdict to the training log of the local classifier."""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "input": text,
+                "is_homework": verdict.is_homework,
+                "reasoning": verdict.reasoning,
+                "time": time.time(),
+            }, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not log guardrail verdict: {e}")
+
 
 async def homework_guardrail(ctx, _, input_data):
-    result = await Runner.run(guardrail_agent, input_data, context=ctx.context)
-    final_output = result.final_output_as(HomeworkOutput)
+    text = input_text(input_data)
+    key = normalize_input(text)
+    verdict = verdict_cache.get(key)
+    if verdict is not None:
+        guardrail_stats["cache"] += 1
+    else:
+        verdict = local_verdict(text)
+        if verdict is None:
+            # Ambiguous: only these pay for the LLM round-trip
+            guardrail_stats["llm"] += 1
+            agent = math_guardrail_agent if contains_math(text) else guardrail_agent
+            result = await Runner.run(agent, input_data, context=ctx.context)
+            verdict = result.final_output_as(HomeworkOutput)
+            log_verdict(text, verdict)
+        verdict_cache.set(key, verdict)
     return GuardrailFunctionOutput(
-        output_info=final_output,
-        tripwire_triggered=not final_output.is_homework,
+        output_info=verdict,
+        tripwire_triggered=not verdict.is_homework,
     )
@@ -0,0 +1,227 @@
+import copy
+import time
+import asyncio
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import replace
+from typing import Any, AsyncIterator, List, Optional
+from agents import (
+    Agent,
+    Model,
+    ModelResponse,
+    Runner,
+    RunConfig,
+    RunHooks,
+    RunResult,
+    RunContextWrapper,
+    InputGuardrail,
+    InputGuardrailResult,
+    InputGuardrailTripwireTriggered,
+    TResponseInputItem,
+)
+from src.utils.constant import GUARDRAIL_SPECULATION_BUDGET
+
+# Speculative steps started, steps that had to wait for a verdict, steps thrown away on a
+# tripwire and guardrail seconds hidden behind the run (overlapping real progress of it)
+speculation_stats: Counter = Counter()
+
+# Gate of the optimistic run in progress; set while its task is created, so only that run sees it
+_run_gate: ContextVar[Optional["SpeculationGate"]] = ContextVar("run_gate", default=None)
+
+
+class SpeculationGate(RunHooks):
+    """
+    Run hooks that hold the run back once its speculation budget is spent.
+
+    Every model turn (one LLM call, see GatedModel) and every tool call is a step.
+    Until the guardrails pass, only ``budget`` steps may begin; the next one waits for
+    the verdict. Calls are forwarded to the caller's own ``hooks``.
+    """
+
+    def __init__(self, passed: asyncio.Event, budget: int, hooks: Optional[RunHooks] = None):
+        self.passed = passed
+        self.budget = budget
+        self.hooks = hooks
+        self.steps = 0
+        self.blocked = 0.0
+        self._blocked_at: Optional[float] = None
+
+    def blocked_seconds(self, now: float) -> float:
+        """Time the run has spent held at the gate, up to ``now``."""
+        current = now - self._blocked_at if self._blocked_at is not None else 0.0
+        return self.blocked + current
+
+    async def step(self) -> None:
+        """Wait until one more step may begin."""
+        if self.passed.is_set():
+            return
+        if self.steps >= self.budget:
+            speculation_stats["waited"] += 1
+            self._blocked_at = time.perf_counter()
+            try:
+                await self.passed.wait()
+            finally:
+                self.blocked += time.perf_counter() - self._blocked_at
+                self._blocked_at = None
+            return
+        self.steps += 1
+        speculation_stats["speculative_steps"] += 1
+
+    async def on_agent_start(self, context, agent) -> None:
+        if self.hooks is not None:
+            await self.hooks.on_agent_start(context, agent)
+
+    async def on_tool_start(self, context, agent, tool) -> None:
+        await self.step()
+        if self.hooks is not None:
+            await self.hooks.on_tool_start(context, agent, tool)
+
+    async def on_agent_end(self, context, agent, output) -> None:
+        if self.hooks is not None:
+            await self.hooks.on_agent_end(context, agent, output)
+
+    async def on_handoff(self, context, from_agent, to_agent) -> None:
+        if self.hooks is not None:
+            await self.hooks.on_handoff(context, from_agent, to_agent)
+
+    async def on_tool_end(self, context, agent, tool, result) -> None:
+        if self.hooks is not None:
+            await self.hooks.on_tool_end(context, agent, tool, result)
+
+
+class GatedModel(Model):
+    """Model that passes the speculation gate before every request."""
+
+    def __init__(self, model: Model, gate: SpeculationGate):
+        self.model = model
+        self.gate = gate
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        await self.gate.step()
+        return await self.model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        await self.gate.step()
+        async for event in self.model.stream_response(*args, **kwargs):
+            yield event
+
+
+class SpeculativeRunner(Runner):
+    """
+    Runner whose model turns go through the current optimistic run's gate.
+
+    Run hooks (openai-agents 0.0.14) only see an agent's first turn, so the model
+    resolved for every turn is wrapped instead.
+    """
+
+    @classmethod
+    def _get_model(cls, agent: Agent[Any], run_config: RunConfig) -> Model:
+        model = super()._get_model(agent, run_config)
+        gate = _run_gate.get()
+        return GatedModel(model, gate) if gate is not None else model
+
+
+async def check_input(
+    agent: Agent[Any],
+    guardrails: List[InputGuardrail],
+    input: str | list[TResponseInputItem],
+    context: Any = None
+) -> List[InputGuardrailResult]:
+    """Run input guardrails concurrently, raising on the first tripwire like the Runner does."""
+    wrapper = RunContextWrapper(context=context)
+    tasks = [asyncio.ensure_future(guardrail.run(agent, copy.deepcopy(input), wrapper)) for guardrail in guardrails]
+    results = []
+    try:
+        for done in asyncio.as_completed(tasks):
+            result = await done
+            if result.output.tripwire_triggered:
+                raise InputGuardrailTripwireTriggered(result)
+            results.append(result)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+async def run_optimistic(
+    starting_agent: Agent[Any],
+    input: str | list[TResponseInputItem],
+    *,
+    context: Any = None,
+    speculation_budget: int = GUARDRAIL_SPECULATION_BUDGET,
+    hooks: Optional[RunHooks] = None,
+    run_config: Optional[RunConfig] = None,
+    **kwargs: Any
+) -> RunResult:
+    """
+    Run an agent while its input guardrails are still being checked.
+
+    ``Runner.run`` only overlaps the guardrails with the first agent's first turn; a
+    handoff target waits for both. Here the whole run (triage, handoff, tools) starts
+    together with the guardrails, up to ``speculation_budget`` model turns and tool
+    calls. The result is
+    only returned once every guardrail passed; on a tripwire the run is cancelled and
+    ``InputGuardrailTripwireTriggered`` is raised as with ``Runner.run``.
+
+    Args:
+        starting_agent (Agent): Agent to run; its input guardrails are applied here
+        input (str | list[TResponseInputItem]): User input
+        context (Any): Run context, shared with the guardrails
+        speculation_budget (int): Model turns and tool calls that may begin before the
+                                  guardrails pass, i.e. the most work a tripwire can waste.
+                                  0 checks the guardrails first.
+        hooks (Optional[RunHooks]): Run hooks, still called for every step
+        run_config (Optional[RunConfig]): Run configuration; its input guardrails are applied here too
+        **kwargs: Passed on to ``Runner.run`` (e.g. ``max_turns``)
+
+    Returns:
+        RunResult: Result of the run, with the guardrail results attached
+    """
+    run_config = run_config or RunConfig()
+    guardrails = starting_agent.input_guardrails + (run_config.input_guardrails or [])
+    if not guardrails:
+        return await Runner.run(starting_agent, input, context=context, hooks=hooks, run_config=run_config, **kwargs)
+
+    start = time.perf_counter()
+    passed = asyncio.Event()
+    gate = SpeculationGate(passed, speculation_budget, hooks)
+    guardrail_task = asyncio.ensure_future(check_input(starting_agent, guardrails, input, context))
+    token = _run_gate.set(gate)
+    try:
+        run_task = asyncio.ensure_future(SpeculativeRunner.run(
+            starting_agent.clone(input_guardrails=[]),
+            copy.deepcopy(input),
+            context=context,
+            hooks=gate,
+            run_config=replace(run_config, input_guardrails=[]),
+            **kwargs,
+        ))
+    finally:
+        _run_gate.reset(token)
+    finished_at: List[float] = []
+
+    def settle(task: asyncio.Future) -> None:
+        finished_at.append(time.perf_counter())
+        # A run that fails while the verdict is pending is reported after the verdict, or dropped with it
+        if not task.cancelled():
+            task.exception()
+
+    run_task.add_done_callback(settle)
+
+    try:
+        guardrail_results = await guardrail_task
+    except BaseException:
+        run_task.cancel()
+        speculation_stats["wasted_steps"] += gate.steps
+        raise
+    finally:
+        guardrail_task.cancel()
+    # The run only hid the guardrail while it was running and not held at the gate
+    overlap_end = min([time.perf_counter(), *finished_at])
+    hidden = overlap_end - start - gate.blocked_seconds(overlap_end)
+    speculation_stats["hidden_guardrail_seconds"] += max(0.0, hidden)
+    passed.set()
+
+    result = await run_task
+    result.input_guardrail_results = guardrail_results
+    return result
@@ -6,4 +6,18 @@ load_dotenv(find_dotenv())
 
 # GLOBAL VARIABLE
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
\ No newline at end of file
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+
+# HOMEWORK GUARDRAIL
+# Verdicts of the LLM guardrail are appended here; train the local classifier from them with
+# `python -m src.guardrails.classifier`, which writes GUARDRAIL_MODEL_PATH
+GUARDRAIL_LOG_PATH = os.getenv("GUARDRAIL_LOG_PATH", "data/guardrail_verdicts.jsonl")
+GUARDRAIL_MODEL_PATH = os.getenv("GUARDRAIL_MODEL_PATH", "data/homework_classifier.json")
+# Probability the local classifier needs to decide without the LLM
+GUARDRAIL_CONFIDENCE = float(os.getenv("GUARDRAIL_CONFIDENCE", 0.9))
+# Vocabulary features an input must share with the training log before the classifier may decide
+GUARDRAIL_MIN_FEATURES = int(os.getenv("GUARDRAIL_MIN_FEATURES", 2))
+GUARDRAIL_CACHE_SIZE = int(os.getenv("GUARDRAIL_CACHE_SIZE", 10000))
+GUARDRAIL_CACHE_TTL = float(os.getenv("GUARDRAIL_CACHE_TTL", 3600))
+# Model turns and tool calls the run may begin before the guardrail passes; 0 waits for it
+GUARDRAIL_SPECULATION_BUDGET = int(os.getenv("GUARDRAIL_SPECULATION_BUDGET", 2))
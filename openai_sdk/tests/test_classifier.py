@@ -0,0 +1,76 @@
+import pytest
+from src.guardrails.classifier import HomeworkClassifier, contains_math, is_math_expression
+
+
+HOMEWORK = [
+    "How do I solve this quadratic equation",
+    "Who was the first president of Indonesia",
+    "Explain the causes of world war one",
+    "What is the derivative of x squared",
+    "Siapa presiden pertama indonesia",
+    "How do I factor this polynomial",
+    "When did the roman empire fall",
+    "Solve the linear equation for x",
+]
+NOT_HOMEWORK = [
+    "Tell me a dark joke",
+    "Book me a flight to Bali",
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    # Mostly homework, like the real verdict log, so the bias leans towards homework
+    return HomeworkClassifier.fit(HOMEWORK * 3 + NOT_HOMEWORK, [True] * len(HOMEWORK) * 3 + [False] * len(NOT_HOMEWORK))
+
+
+def test_bias_alone_leans_towards_homework(model):
+    assert model.predict_proba("zzz qqq") > 0.5
+
+
+def test_input_without_known_features_goes_to_the_llm(model):
+    assert model.verdict("zzz qqq", confidence=0.5) == (None, pytest.approx(model.predict_proba("zzz qqq")))
+    # One shared word is not enough to decide either
+    assert model.verdict("please zzz qqq", confidence=0.5, min_features=2)[0] is None
+
+
+def test_threshold_decides_only_confident_inputs(model):
+    text = "How do I solve this quadratic equation"
+    probability = model.predict_proba(text)
+    assert model.verdict(text, confidence=probability - 1e-9)[0] is True
+    assert model.verdict(text, confidence=min(probability + 0.01, 0.999))[0] is None
+
+    joke = "Tell me a dark joke"
+    probability = model.predict_proba(joke)
+    assert probability < 0.5
+    assert model.verdict(joke, confidence=1 - probability - 1e-9)[0] is False
+    assert model.verdict(joke, confidence=min(1 - probability + 0.01, 0.999))[0] is None
+
+
+def test_save_and_load_round_trip(model, tmp_path):
+    path = tmp_path / "model.json"
+    model.save(str(path))
+    loaded = HomeworkClassifier.load(str(path))
+    assert loaded.predict_proba("Solve the linear equation") == pytest.approx(model.predict_proba("Solve the linear equation"))
+
+
+@pytest.mark.parametrize("text", ["12 * 7", "3x + 5 = 20", "x^2", "berapa 12 * 7 + 3 / 2?"])
+def test_math_expressions_short_circuit(text):
+    assert is_math_expression(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Beri saya Joke gelap! 2+2",
+    "Years 1945 - 1949",
+    "Flight at 10:30 - 11:45",
+    "call 555 - 1234",
+    "I have 2 x 3 rooms",
+])
+def test_arithmetic_inside_other_text_is_only_a_hint(text):
+    assert not is_math_expression(text)
+    assert contains_math(text)
+
+
+@pytest.mark.parametrize("text", ["axe", "sexy", "x-ray", "a b c"])
+def test_words_are_not_arithmetic(text):
+    assert not contains_math(text)
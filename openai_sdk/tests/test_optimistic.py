@@ -0,0 +1,92 @@
+import json
+import asyncio
+import pytest
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    InputGuardrailTripwireTriggered,
+    Model,
+    ModelResponse,
+    RunConfig,
+    Usage,
+    function_tool,
+    input_guardrail,
+)
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+from src.guardrails.optimistic import run_optimistic
+
+
+class ScriptedModel(Model):
+    """Calls the ``lookup`` tool ``tool_turns`` times, then answers."""
+
+    def __init__(self, tool_turns: int):
+        self.tool_turns = tool_turns
+        self.calls = 0
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        self.calls += 1
+        if self.calls <= self.tool_turns:
+            item = ResponseFunctionToolCall(
+                id=f"fc_{self.calls}", call_id=f"call_{self.calls}", name="lookup",
+                arguments=json.dumps({"n": self.calls}), type="function_call",
+            )
+        else:
+            item = ResponseOutputMessage(
+                id="msg", role="assistant", status="completed", type="message",
+                content=[ResponseOutputText(text="done", type="output_text", annotations=[])],
+            )
+        return ModelResponse(output=[item], usage=Usage(), response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def make_agent(model: Model, tripwire: bool, delay: float = 0.1):
+    looked_up = []
+
+    @function_tool
+    def lookup(n: int) -> str:
+        """Look something up."""
+        looked_up.append(n)
+        return str(n)
+
+    @input_guardrail
+    async def slow_guardrail(context, agent, input) -> GuardrailFunctionOutput:
+        await asyncio.sleep(delay)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=tripwire)
+
+    agent = Agent(name="worker", instructions="", model=model, tools=[lookup], input_guardrails=[slow_guardrail])
+    return agent, looked_up
+
+
+def run(agent: Agent, budget: int):
+    return asyncio.run(run_optimistic(agent, "question", speculation_budget=budget,
+                                      run_config=RunConfig(tracing_disabled=True)))
+
+
+def test_tripwire_after_budget_aborts_the_run():
+    model = ScriptedModel(tool_turns=3)
+    agent, looked_up = make_agent(model, tripwire=True)
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        run(agent, budget=2)
+    # First model turn and its tool call used the budget; the second turn never reached the LLM
+    assert model.calls == 1
+    assert looked_up == [1]
+
+
+def test_passing_guardrail_releases_every_turn():
+    model = ScriptedModel(tool_turns=3)
+    agent, looked_up = make_agent(model, tripwire=False)
+    result = run(agent, budget=2)
+    assert result.final_output == "done"
+    assert model.calls == 4
+    assert looked_up == [1, 2, 3]
+    assert len(result.input_guardrail_results) == 1
+
+
+def test_zero_budget_waits_for_the_verdict():
+    model = ScriptedModel(tool_turns=1)
+    agent, _ = make_agent(model, tripwire=True, delay=0.05)
+    with pytest.raises(InputGuardrailTripwireTriggered):
+        run(agent, budget=0)
+    assert model.calls == 0